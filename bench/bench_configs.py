@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+import os
+
+from litex_hw_ci import LiteXCIConfig, LiteXCITest, bios_smoke_tests
+
+# LiteX CI Bench Config Definitions ----------------------------------------------------------------
+
+# Notes:
+# - Used by bench/bench.py: bench_board stub target (bench/litex_boards) and simulated board tty.
+
+tty       = os.environ.get("LITEX_HW_CI_BENCH_TTY", "/dev/null")
+configs   = int(os.environ.get("LITEX_HW_CI_BENCH_CONFIGS", "4"))
+log_lines = int(os.environ.get("LITEX_HW_CI_BENCH_LOG_LINES", "1000"))
+
+tests = [
+    LiteXCITest(send="reboot\n",                sleep=0.1),
+    LiteXCITest(keyword="Memtest OK",           timeout=60.0),
+    LiteXCITest(keyword="Network Test: OK",     timeout=60.0),
+    LiteXCITest(keyword="Welcome to Buildroot", timeout=60.0),
+]
+
+litex_ci_configs = {}
+for i in range(configs):
+    litex_ci_configs[f"bench_{i}"] = LiteXCIConfig(
+        target           = "bench_board",
+        gateware_command = f"--cpu-type=vexriscv --log-lines={log_lines}",
+        tty              = tty,
+        tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+    )
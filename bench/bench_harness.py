@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# LiteX HW CI harness self-benchmarks: measures the orchestration overhead (execute_command, test(),
+# report updates and end-to-end runs) against a stub LiteX-Boards target and a PTY-backed
+# simulated board, so regressions are caught before reaching the lab.
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+import contextlib
+
+from pathlib import Path
+
+bench_dir = Path(__file__).resolve().parent
+root_dir  = bench_dir.parent
+sys.path.insert(0, str(root_dir))
+
+from litex_hw_ci import LiteXCIConfig, LiteXCITest, LiteXCIStatus, LiteXCIConsole, LiteXCIMatcher
+from litex_hw_ci import LiteXCIReport, execute_command, open_serial
+from litex_hw_ci_serialboot import LiteXCISerialBoot
+from litex_hw_ci_log import LiteXCILogWatcher
+from litex_hw_ci_worker import worker_request, wait_worker
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def get_cpu_time(who=resource.RUSAGE_SELF):
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+class BenchTimer:
+    def __enter__(self):
+        self.wall     = time.monotonic()
+        self.cpu      = get_cpu_time()
+        self.children = get_cpu_time(resource.RUSAGE_CHILDREN)
+        return self
+
+    def __exit__(self, *args):
+        self.wall     = time.monotonic() - self.wall
+        self.cpu      = get_cpu_time() - self.cpu
+        self.children = get_cpu_time(resource.RUSAGE_CHILDREN) - self.children
+
+@contextlib.contextmanager
+def quiet():
+    # Console echo still performed (part of the overhead), but to /dev/null.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+@contextlib.contextmanager
+def sim_board(baudrate, volume, events=None, args=[]):
+    command = [sys.executable, str(bench_dir / "sim_board.py"), f"--baudrate={baudrate}", f"--volume={volume}"] + args
+    if events is not None:
+        command += [f"--events={events}"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        yield process.stdout.readline().strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+def is_running(pid):
+    # Process exists and is not a zombie.
+    try:
+        return Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return False
+
+def print_result(name, result):
+    values = ", ".join(f"{k}: {v:.3f}" if isinstance(v, float) else f"{k}: {v}" for k, v in result.items())
+    print(f"{name:<24s} {values}")
+
+# Benchmarks ---------------------------------------------------------------------------------------
+
+def bench_execute_command(lines, line_length, compression, echo_rate):
+    # Child generating a build log of lines x line_length bytes.
+    command = f"{sys.executable} -c \"import sys; [sys.stdout.write('x'*{line_length - 1} + chr(10)) for _ in range({lines})]\""
+    with tempfile.TemporaryDirectory() as tmp, quiet(), BenchTimer() as t:
+        execute_command(command, Path(tmp) / "bench.rpt", compression=compression, echo_rate=echo_rate)
+    size = lines*line_length
+    return {
+        "size_mb"        : size/1e6,
+        "wall_s"         : t.wall,
+        "cpu_s"          : t.cpu,
+        "throughput_mbs" : size/1e6/t.wall,
+        "cpu_per_mb_s"   : t.cpu/(size/1e6),
+    }
+
+def bench_test(baudrate, volume):
+    # Full test() step against simulated board.
+    tests = [
+        LiteXCITest(send="reboot\n",                sleep=0.1),
+        LiteXCITest(keyword="Memtest OK",           timeout=600.0),
+        LiteXCITest(keyword="Network Test: OK",     timeout=600.0),
+        LiteXCITest(keyword="Welcome to Buildroot", timeout=600.0),
+    ]
+    with tempfile.TemporaryDirectory() as tmp, sim_board(baudrate, volume) as tty:
+        config = LiteXCIConfig(tty=tty, tty_baudrate=baudrate, tests=tests)
+        config.output_dir = Path(tmp)
+        with quiet(), BenchTimer() as t:
+            status = config.test()
+    return {
+        "status" : LiteXCIStatus(status).name,
+        "wall_s" : t.wall,
+        "cpu_s"  : t.cpu,
+        "steps"  : " / ".join(f"{timing['elapsed']:.2f}s" for timing in config.test_timings if "elapsed" in timing),
+    }
+
+def bench_console_latency(baudrate, volume, keywords=["Memtest OK", "Network Test: OK", "Welcome to Buildroot"]):
+    # Latency between keyword emission by simulated board and its match by the console engine.
+    async def run(tty):
+        loop    = asyncio.get_running_loop()
+        fd      = open_serial(tty, baudrate)
+        console = LiteXCIConsole(fd, echo=False)
+        console.open()
+        matches = {}
+        try:
+            console.write("reboot\n")
+            for keyword in keywords:
+                if await console.expect(LiteXCIMatcher(keyword), deadline=loop.time() + 600.0):
+                    matches[keyword] = loop.time()
+        finally:
+            console.close()
+            os.close(fd)
+        return matches
+
+    with tempfile.TemporaryDirectory() as tmp:
+        events = Path(tmp) / "events.json"
+        with sim_board(baudrate, volume, events=events) as tty, BenchTimer() as t:
+            matches = asyncio.run(run(tty))
+        emitted   = {e["line"]: e["time"] for e in map(json.loads, events.read_text().splitlines())}
+        latencies = [matches[k] - emitted[k] for k in keywords if k in matches and k in emitted]
+    return {
+        "matched"        : f"{len(matches)}/{len(keywords)}",
+        "cpu_s"          : t.cpu,
+        "max_latency_ms" : max(latencies, default=float("nan"))*1e3,
+        "avg_latency_ms" : sum(latencies)/max(len(latencies), 1)*1e3,
+    }
+
+def bench_serialboot(baudrate, image_size, window, ack_latency, crc_errors):
+    # Native serialboot of boot images against simulated bootloader (loaded regions checked).
+    images = {"Image": image_size, "rootfs.cpio": image_size//2, "opensbi.bin": 64*1024}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp      = Path(tmp)
+        boot     = {}
+        expected = {}
+        for n, (name, size) in enumerate(images.items()):
+            data    = os.urandom(size)
+            address = 0x40000000 + n*0x01000000
+            (tmp / name).write_bytes(data)
+            boot[name]                  = f"0x{address:08x}"
+            expected[f"0x{address:08x}"] = {"size": size, "sha256": hashlib.sha256(data).hexdigest()}
+        (tmp / "boot.json").write_text(json.dumps(boot))
+
+        async def run(tty):
+            loop       = asyncio.get_running_loop()
+            fd         = open_serial(tty, baudrate)
+            serialboot = LiteXCISerialBoot(fd, tmp / "boot.json", window=window)
+            console    = LiteXCIConsole(fd, echo=False, serialboot=serialboot)
+            console.open()
+            try:
+                console.write("serialboot\n")
+                booted = await console.expect(LiteXCIMatcher("Welcome to Buildroot"), deadline=loop.time() + 600.0)
+            finally:
+                console.close()
+                os.close(fd)
+            return serialboot, booted
+
+        args = [f"--ack-latency={ack_latency}", f"--crc-errors={crc_errors}", f"--loads={tmp / 'loads.json'}"]
+        with sim_board(baudrate, 1, args=args) as tty, BenchTimer() as t:
+            serialboot, booted = asyncio.run(run(tty))
+        loaded = json.loads((tmp / "loads.json").read_text()) == expected if (tmp / "loads.json").exists() else False
+
+    size     = sum(stats["size"]     for stats in serialboot.stats)
+    duration = sum(stats["duration"] for stats in serialboot.stats)
+    return {
+        "booted"         : booted and loaded,
+        "window"         : window,
+        "cpu_s"          : t.cpu,
+        "upload_s"       : duration,
+        "throughput_kbs" : size/max(duration, 1e-6)/1e3,
+        "efficiency"     : size/max(duration, 1e-6)/(baudrate/10),
+        "crc_errors"     : sum(stats["crc_errors"] for stats in serialboot.stats),
+    }
+
+def bench_worker_cancel(build_time):
+    # Fail-fast of a gateware build run through the warm worker: Fatal signature emitted while the
+    # (simulated) toolchain is running, the toolchain process must be terminated with the request.
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp    = Path(tmp)
+        socket = tmp / "worker.sock"
+        env    = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join([str(bench_dir), str(root_dir), env.get("PYTHONPATH", "")])
+        worker = subprocess.Popen([sys.executable, str(root_dir / "litex_hw_ci_worker.py"), "serve", f"--socket={socket}"],
+            env=env, stdout=subprocess.DEVNULL)
+        try:
+            wait_worker(str(socket))
+            command = f"{sys.executable} {root_dir / 'litex_hw_ci_worker.py'} request --socket={socket} \
+            --action=gateware_build --target=bench_board --output-dir={tmp} \
+            --build-args='--build-time={build_time} --fatal-error' -- --log-lines=10"
+            with quiet(), BenchTimer() as t:
+                success = execute_command(command, tmp / "gateware_build.rpt", watcher=LiteXCILogWatcher(["vivado"]), env=env)
+
+            # Toolchain process terminated by the worker (cancel request), worker still serving.
+            pid      = int((tmp / "toolchain.pid").read_text()) if (tmp / "toolchain.pid").exists() else None
+            deadline = time.monotonic() + 5.0
+            while (pid is not None) and is_running(pid) and (time.monotonic() < deadline):
+                time.sleep(0.05)
+            stopped = (pid is not None) and not is_running(pid)
+            with open(os.devnull, "w") as devnull:
+                alive = worker_request(str(socket), "release", "bench_board", ["--log-lines=10"], output=devnull) == 0
+        finally:
+            with open(os.devnull, "w") as devnull:
+                worker_request(str(socket), "stop", output=devnull)
+            worker.wait()
+    return {
+        "failed"            : not success,
+        "toolchain_stopped" : stopped,
+        "worker_alive"      : alive,
+        "fail_fast_s"       : t.wall,
+    }
+
+def bench_worker_elaboration():
+    # Firmware build, gateware build and load served from a single warm elaboration of a target
+    # modifying its SoC after construction (--with-sdcard): Each request must apply it once.
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp    = Path(tmp)
+        socket = tmp / "worker.sock"
+        env    = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join([str(bench_dir), str(root_dir), env.get("PYTHONPATH", "")])
+        worker = subprocess.Popen([sys.executable, str(root_dir / "litex_hw_ci_worker.py"), "serve", f"--socket={socket}"],
+            env=env, stdout=subprocess.DEVNULL)
+        try:
+            wait_worker(str(socket))
+            codes = []
+            with open(os.devnull, "w") as devnull, BenchTimer() as t:
+                for action in ["firmware_build", "gateware_build", "load"]:
+                    codes.append(worker_request(str(socket), action, "bench_board", ["--log-lines=10", "--with-sdcard"], tmp, output=devnull))
+            sdcard = json.loads((tmp / "soc.json").read_text())["constants"]["config_with_sdcard"] if (tmp / "soc.json").exists() else 0
+        finally:
+            with open(os.devnull, "w") as devnull:
+                worker_request(str(socket), "stop", output=devnull)
+            worker.wait()
+    return {
+        "passed"      : f"{codes.count(0)}/{len(codes)}",
+        "with_sdcard" : bool(sdcard),
+        "wall_s"      : t.wall,
+    }
+
+def bench_report(configs, iterations):
+    steps = ["firmware_build", "gateware_build", "setup", "load", "smoke", "software_build", "test", "exit"]
+    names = [f"bench_{i}" for i in range(configs)]
+    cwd   = os.getcwd()
+    os.chdir(root_dir) # Templates are loaded relatively to root directory.
+    try:
+        with tempfile.TemporaryDirectory() as tmp, BenchTimer() as t:
+            report = LiteXCIReport(Path(tmp) / "bench.html", names, steps, "-", "bench")
+            for i in range(iterations):
+                report.update(names[i%configs], steps[i%len(steps)], LiteXCIStatus.SUCCESS, time.time() - 12.34)
+    finally:
+        os.chdir(cwd)
+    return {
+        "configs"     : configs,
+        "wall_s"      : t.wall,
+        "cpu_s"       : t.cpu,
+        "per_call_ms" : t.wall/iterations*1e3,
+    }
+
+def bench_end_to_end(configs, log_lines, baudrate, volume):
+    # Full litex_hw_ci.py run on bench configs (bench_board stub target + simulated board).
+    with tempfile.TemporaryDirectory() as tmp, sim_board(baudrate, volume) as tty:
+        env = os.environ.copy()
+        env["PYTHONPATH"]                  = os.pathsep.join([str(bench_dir), str(root_dir), env.get("PYTHONPATH", "")])
+        env["LITEX_HW_CI_BENCH_TTY"]       = tty
+        env["LITEX_HW_CI_BENCH_CONFIGS"]   = str(configs)
+        env["LITEX_HW_CI_BENCH_LOG_LINES"] = str(log_lines)
+        command = [sys.executable, "litex_hw_ci.py", "bench/bench_configs.py", f"--report={tmp}/bench.html", f"--history={tmp}/history.db"]
+        with BenchTimer() as t:
+            subprocess.run(command, cwd=root_dir, env=env, stdout=subprocess.DEVNULL)
+
+    # Count passing configs (all test steps matched) and cleanup.
+    passed = 0
+    for i in range(configs):
+        timings = root_dir / f"build_bench_{i}" / "test_timings.json"
+        if timings.exists() and all(t.get("status", "OK") == "OK" for t in json.loads(timings.read_text())):
+            passed += 1
+        shutil.rmtree(root_dir / f"build_bench_{i}", ignore_errors=True)
+    return {
+        "passed"       : f"{passed}/{configs}",
+        "wall_s"       : t.wall,
+        "cpu_s"        : t.children,
+        "per_config_s" : t.wall/configs,
+    }
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX HW CI Harness Benchmarks.")
+    parser.add_argument("--benchs",         default="execute_command,test,console_latency,serialboot,worker_cancel,worker_elaboration,report,end_to_end", help="Benchmarks to run (comma separated).")
+    parser.add_argument("--baudrate",       default=115200,  type=int,  help="Simulated board baudrate.")
+    parser.add_argument("--volume",         default=1,       type=int,  help="Simulated board Linux log volume (repetitions).")
+    parser.add_argument("--log-lines",      default=100000,  type=int,  help="execute_command: Log lines.")
+    parser.add_argument("--line-length",    default=100,     type=int,  help="execute_command: Log line length.")
+    parser.add_argument("--log-compression", default="gzip",            help="execute_command: Log compression (none, gzip or zstd).")
+    parser.add_argument("--log-echo-rate",  default=256,     type=int,  help="execute_command: Console echo rate limit (in KB/s, 0: Unlimited).")
+    parser.add_argument("--serialboot-baudrate",    default=4000000, type=int,   help="serialboot: Baudrate.")
+    parser.add_argument("--serialboot-size",        default=1000000, type=int,   help="serialboot: Image size (in bytes).")
+    parser.add_argument("--serialboot-window",      default=128,     type=int,   help="serialboot: Max outstanding frames (1: Stop-and-wait).")
+    parser.add_argument("--serialboot-ack-latency", default=0.001,   type=float, help="serialboot: Simulated acks latency (in seconds).")
+    parser.add_argument("--serialboot-crc-errors",  default=0,       type=int,   help="serialboot: Simulated CRC error every N frames (0: Disabled).")
+    parser.add_argument("--cancel-build-time", default=60.0, type=float, help="worker_cancel: Simulated toolchain run time (in seconds).")
+    parser.add_argument("--report-configs", default=200,     type=int,  help="Report: Number of configs.")
+    parser.add_argument("--report-calls",   default=20,      type=int,  help="Report: Number of updates.")
+    parser.add_argument("--e2e-configs",    default=4,       type=int,  help="end_to_end: Number of configs.")
+    parser.add_argument("--e2e-log-lines",  default=1000,    type=int,  help="end_to_end: Stub target build log lines.")
+    parser.add_argument("--json",                                       help="Save results to JSON file.")
+    args = parser.parse_args()
+
+    benchs  = {
+        "execute_command"    : lambda: bench_execute_command(args.log_lines, args.line_length, args.log_compression, args.log_echo_rate*1024 or None),
+        "test"               : lambda: bench_test(args.baudrate, args.volume),
+        "console_latency"    : lambda: bench_console_latency(args.baudrate, args.volume),
+        "serialboot"         : lambda: bench_serialboot(args.serialboot_baudrate, args.serialboot_size, args.serialboot_window,
+            args.serialboot_ack_latency, args.serialboot_crc_errors),
+        "worker_cancel"      : lambda: bench_worker_cancel(args.cancel_build_time),
+        "worker_elaboration" : bench_worker_elaboration,
+        "report"             : lambda: bench_report(args.report_configs, args.report_calls),
+        "end_to_end"         : lambda: bench_end_to_end(args.e2e_configs, args.e2e_log_lines, args.baudrate, args.volume),
+    }
+    results = {}
+    for name in args.benchs.split(","):
+        results[name] = benchs[name]()
+        print_result(name, results[name])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# Stub LiteX-Boards target used by the harness benchmarks: mimics the target's command line and
+# outputs (build logs, bitstream, soc.json) without LiteX/toolchains.
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Bench SoC ----------------------------------------------------------------------------------------
+
+class BaseSoC:
+    def __init__(self, cpu_type="vexriscv"):
+        self.cpu_type = cpu_type
+        self.sdcard   = False
+
+    def add_sdcard(self):
+        # Post-construction SoC modification (ex: add_spi_sdcard), fails when applied twice as LiteX.
+        if self.sdcard:
+            raise ValueError("sdcard submodule already added.")
+        self.sdcard = True
+
+# Build --------------------------------------------------------------------------------------------
+
+def build(soc, output_dir, soc_json=None, compile_gateware=True, log_lines=1000, build_time=0.0, fatal_error=False):
+    # Software (BIOS) build logs.
+    for i in range(log_lines):
+        print(f" CC       bench_{i:06d}.o")
+    if soc_json is not None:
+        with open(soc_json, "w") as f:
+            json.dump({"constants": {"config_cpu_human_name": soc.cpu_type, "config_with_sdcard": int(soc.sdcard)}}, f)
+
+    # Gateware build logs/bitstream.
+    if compile_gateware:
+        # Simulated toolchain process (pid in toolchain.pid), fatal error emitted while running.
+        toolchain = None
+        if build_time > 0:
+            os.makedirs(output_dir, exist_ok=True)
+            toolchain = subprocess.Popen([sys.executable, "-c", f"import time; time.sleep({build_time})"])
+            with open(os.path.join(output_dir, "toolchain.pid"), "w") as f:
+                f.write(str(toolchain.pid))
+        if fatal_error:
+            print("ERROR: [Bench 1-0] Simulated fatal error.", flush=True)
+        if toolchain is not None:
+            toolchain.wait()
+        for i in range(log_lines):
+            print(f"INFO: [Bench 1-{i}] Placing/Routing cell bench_cell_{i:06d}.")
+        os.makedirs(os.path.join(output_dir, "gateware"), exist_ok=True)
+        with open(os.path.join(output_dir, "gateware", "bench_board.bit"), "wb") as f:
+            f.write(bytes(1024))
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX HW CI Bench Board.")
+    parser.add_argument("--cpu-type",            default="vexriscv")
+    parser.add_argument("--output-dir",          default="build/bench_board")
+    parser.add_argument("--soc-json")
+    parser.add_argument("--build",               action="store_true")
+    parser.add_argument("--load",                action="store_true")
+    parser.add_argument("--no-compile-gateware", action="store_true")
+    parser.add_argument("--log-lines",           default=1000, type=int, help="Build log lines per stage.")
+    parser.add_argument("--build-time",          default=0.0,  type=float, help="Simulated gateware build time (s).")
+    parser.add_argument("--fatal-error",         action="store_true",      help="Emit a fatal (Vivado) error during gateware build.")
+    parser.add_argument("--with-sdcard",         action="store_true",      help="Add SDCard to the SoC (after construction).")
+    args, _ = parser.parse_known_args()
+
+    soc = BaseSoC(cpu_type=args.cpu_type)
+    if args.with_sdcard:
+        soc.add_sdcard()
+    if args.build:
+        build(soc, args.output_dir,
+            soc_json         = args.soc_json,
+            compile_gateware = not args.no_compile_gateware,
+            log_lines        = args.log_lines,
+            build_time       = args.build_time,
+            fatal_error      = args.fatal_error,
+        )
+    if args.load:
+        if not os.path.exists(os.path.join(args.output_dir, "gateware", "bench_board.bit")):
+            print("Error: bitstream not found.")
+            sys.exit(1)
+        print("Loading bench_board.bit... done.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# PTY-backed simulated board: replays recorded BIOS/Linux boot transcripts on "reboot" at a given
+# baudrate (and output volume), and answers a few BIOS commands. On "serialboot", the BIOS SFL
+# bootloader is simulated (frames received at baudrate, acks delayed by ack latency, optional CRC
+# errors injection) and the Linux transcript replayed after the jump. The PTY slave path is printed
+# on stdout and can be used as the config's tty.
+
+import os
+import pty
+import sys
+import json
+import time
+import struct
+import select
+import hashlib
+import binascii
+import argparse
+import termios
+import collections
+
+from pathlib import Path
+
+# Constants ----------------------------------------------------------------------------------------
+
+transcripts_dir = Path(__file__).parent / "transcripts"
+
+bios_commands = {
+    b"ident" : b"Ident: LiteX Bench SoC 2024-01-01 00:00:00\r\n",
+    b"help"  : b"\r\nLiteX BIOS, available commands:\r\n\r\nreboot  - Reboot\r\nident   - Identifier of the system\r\nhelp    - Print this help\r\n",
+}
+
+# SFL (LiteX BIOS serialboot protocol).
+sfl_magic_req = b"sL5DdSMmkekro\n"
+sfl_magic_ack = b"z6IHG7cYDID6o\n"
+sfl_cmd_abort = 0x00
+sfl_cmd_load  = 0x01
+sfl_cmd_jump  = 0x02
+
+# Transcript ---------------------------------------------------------------------------------------
+
+def get_boot_transcript(transcripts, volume=1):
+    # Concatenate transcripts, Linux kernel log lines repeated volume times.
+    lines = []
+    for transcript in transcripts:
+        for line in (transcripts_dir / f"{transcript}.txt").read_text().splitlines():
+            repeat = volume if line.startswith("[ ") else 1
+            lines += [line] * repeat
+    return "".join(f"{line}\r\n" for line in lines).encode()
+
+# Sim Board ----------------------------------------------------------------------------------------
+
+class SimBoard:
+    def __init__(self, baudrate=115200, transcripts=["bios", "linux"], volume=1, events=None,
+        ack_latency=0.0, crc_errors=0, loads=None):
+        self.byte_time   = 10/baudrate # 8N1.
+        self.transcript  = get_boot_transcript(transcripts, volume)
+        self.linux       = get_boot_transcript([t for t in transcripts if t != "bios"], volume)
+        self.events      = events
+        self.ack_latency = ack_latency # Acks latency (ex: USB-UART).
+        self.crc_errors  = crc_errors  # Reply CRC error every crc_errors frames (0: Disabled).
+        self.loads       = loads       # JSON file receiving loaded regions (address: size/sha256).
+        self.board_fd, self.tty_fd = pty.openpty()
+
+        # Raw TTY (as a board UART would be).
+        attrs = termios.tcgetattr(self.tty_fd)
+        attrs[0] = attrs[1] = 0
+        attrs[3] &= ~(termios.ECHO | termios.ICANON | termios.ISIG | termios.IEXTEN)
+        termios.tcsetattr(self.tty_fd, termios.TCSANOW, attrs)
+
+    @property
+    def tty(self):
+        return os.ttyname(self.tty_fd)
+
+    def log_event(self, line):
+        if self.events is not None:
+            self.events.write(json.dumps({"line": line.decode(errors="replace"), "time": time.monotonic()}) + "\n")
+            self.events.flush()
+
+    def send(self, data, chunk_size=64):
+        # Throttle output to baudrate, logging emission time of each line.
+        start_time = time.monotonic()
+        sent       = 0
+        for line in data.splitlines(keepends=True):
+            for i in range(0, len(line), chunk_size):
+                chunk = line[i:i + chunk_size]
+                delay = start_time + (sent + len(chunk))*self.byte_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                os.write(self.board_fd, chunk)
+                sent += len(chunk)
+            self.log_event(line.strip())
+
+    def serialboot(self, data):
+        # Request images, then process frames (received at baudrate) until jump/abort.
+        self.send(sfl_magic_req)
+        rx_time = time.monotonic()
+        acks    = collections.deque()
+        memory  = {}
+        frames  = 0
+        deadline = time.monotonic() + 10.0
+        while True:
+            # Send due acks.
+            now = time.monotonic()
+            while acks and acks[0][0] <= now:
+                os.write(self.board_fd, acks.popleft()[1])
+            # Process received frames.
+            if data.startswith(sfl_magic_ack):
+                data = data[len(sfl_magic_ack):]
+                deadline = None
+            while deadline is None and len(data) >= 4 and len(data) >= 4 + data[0]:
+                length, crc, cmd = struct.unpack(">BHB", data[:4])
+                payload, data = data[4:4 + length], data[4 + length:]
+                frames += 1
+                if (binascii.crc_hqx(payload, binascii.crc_hqx(bytes([cmd]), 0)) != crc) or \
+                   (self.crc_errors and frames % self.crc_errors == 0):
+                    acks.append((now + self.ack_latency, b"C"))
+                    continue
+                acks.append((now + self.ack_latency, b"K"))
+                if cmd == sfl_cmd_load:
+                    memory[struct.unpack(">I", payload[:4])[0]] = payload[4:]
+                elif cmd in [sfl_cmd_jump, sfl_cmd_abort]:
+                    while acks:
+                        time.sleep(max(acks[0][0] - time.monotonic(), 0))
+                        os.write(self.board_fd, acks.popleft()[1])
+                    if cmd == sfl_cmd_jump:
+                        self.write_loads(memory)
+                        self.send(self.linux)
+                    return data
+            if (deadline is not None) and (time.monotonic() > deadline):
+                self.send(b"Timeout\r\n")
+                return data
+            # Receive (at baudrate).
+            timeout = max(acks[0][0] - time.monotonic(), 0) if acks else 1.0
+            if select.select([self.board_fd], [], [], timeout)[0]:
+                try:
+                    received = os.read(self.board_fd, 4096)
+                except OSError:
+                    return b""
+                rx_time = max(rx_time, time.monotonic()) + len(received)*self.byte_time
+                time.sleep(max(rx_time - time.monotonic(), 0))
+                data += received
+
+    def write_loads(self, memory):
+        # Merge contiguous loaded frames in regions.
+        regions = []
+        for address in sorted(memory):
+            if regions and regions[-1][0] + len(regions[-1][1]) == address:
+                regions[-1][1].extend(memory[address])
+            else:
+                regions.append([address, bytearray(memory[address])])
+        if self.loads is not None:
+            with open(self.loads, "w") as f:
+                json.dump({f"0x{address:08x}": {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()} for address, data in regions}, f)
+
+    def run(self):
+        data = b""
+        while True:
+            try:
+                received = os.read(self.board_fd, 1024)
+            except OSError:
+                return
+            if not received:
+                return
+            data += received
+            while b"\n" in data:
+                command, data = data.split(b"\n", 1)
+                command = command.strip()
+                if command == b"reboot":
+                    self.send(self.transcript)
+                elif command == b"serialboot":
+                    data = self.serialboot(data)
+                elif command in bios_commands:
+                    self.send(bios_commands[command])
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX HW CI Simulated Board.")
+    parser.add_argument("--baudrate",    default=115200,        type=int, help="Simulated UART baudrate.")
+    parser.add_argument("--transcripts", default="bios,linux",            help="Boot transcripts to replay (comma separated).")
+    parser.add_argument("--volume",      default=1,             type=int, help="Linux kernel log lines repetition (output volume).")
+    parser.add_argument("--events",                                       help="JSON-lines file logging emission time of each line.")
+    parser.add_argument("--ack-latency", default=0.0,           type=float, help="Serialboot: Acks latency (in seconds).")
+    parser.add_argument("--crc-errors",  default=0,             type=int, help="Serialboot: Reply CRC error every N frames (0: Disabled).")
+    parser.add_argument("--loads",                                        help="Serialboot: JSON file receiving loaded regions (size/sha256).")
+    args = parser.parse_args()
+
+    events = open(args.events, "w") if args.events else None
+    board  = SimBoard(
+        baudrate    = args.baudrate,
+        transcripts = args.transcripts.split(","),
+        volume      = args.volume,
+        events      = events,
+        ack_latency = args.ack_latency,
+        crc_errors  = args.crc_errors,
+        loads       = args.loads,
+    )
+    print(board.tty, flush=True)
+    board.run()
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@
 # Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
 # SPDX-License-Identifier: BSD-2-Clause
 
-from litex_hw_ci import LiteXCIConfig, LiteXCITest, get_local_ip
+from litex_hw_ci import LiteXCIConfig, LiteXCITest, bios_smoke_tests, get_local_ip
 
 # LiteX CI Config Definitions ----------------------------------------------------------------------
 
@@ -23,7 +23,7 @@ from litex_hw_ci import LiteXCIConfig, LiteXCITest, get_local_ip
 local_ip    = "192.168.1.50"
 remote_ip   = get_local_ip()
 
-linux_build_args = "--clean --build --generate-dtb --prepare-tftp --copy-images"
+linux_build_args = "--build --cache --generate-dtb --prepare-tftp --copy-images"
 
 tests = [
     LiteXCITest(send="reboot\n",                sleep=1),
@@ -52,6 +52,8 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:acorn"],
     ),
     # Acorn Baseboard Mini running NaxRiscv-32-bit with:
     # - Wishbone Bus.
@@ -70,6 +72,8 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:acorn"],
     ),
     # Acorn Baseboard Mini running NaxRiscv-32-bit with:
     # - AXI-Lite Bus.
@@ -88,6 +92,8 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:acorn"],
     ),
     # Acorn Baseboard Mini running NaxRiscv-64-bit with:
     # - Wishbone Bus.
@@ -106,6 +112,8 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:acorn"],
     ),
     # Acorn Baseboard Mini running NaxRiscv-64-bit with:
     # - AXI-Lite Bus.
@@ -124,6 +132,8 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:acorn"],
     ),
     # Acorn Baseboard Mini running Rocket with:
     # - 1 Core
@@ -138,6 +148,8 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:acorn"],
     ),
     # Acorn Baseboard Mini running VexiiRiscv-32-bit with:
     # - AXI-Lite Bus.
@@ -155,6 +167,8 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:acorn"],
     ),
     # Acorn Baseboard Mini running VexiiRiscv-64-bit with:
     # - AXI-Lite Bus.
@@ -172,5 +186,7 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:acorn"],
     ),
 }
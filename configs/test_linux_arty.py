@@ -6,7 +6,7 @@
 # Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
 # SPDX-License-Identifier: BSD-2-Clause
 
-from litex_hw_ci import LiteXCIConfig, LiteXCITest, get_local_ip
+from litex_hw_ci import LiteXCIConfig, LiteXCITest, bios_smoke_tests, get_local_ip
 
 # LiteX CI Config Definitions ----------------------------------------------------------------------
 
@@ -19,7 +19,7 @@ from litex_hw_ci import LiteXCIConfig, LiteXCITest, get_local_ip
 local_ip    = "192.168.1.50"
 remote_ip   = get_local_ip()
 
-linux_build_args = "--clean --build --generate-dtb --prepare-tftp --copy-images"
+linux_build_args = "--build --cache --generate-dtb --prepare-tftp --copy-images"
 
 tests = [
     LiteXCITest(send="reboot\n",                sleep=1),
@@ -53,6 +53,8 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:arty"],
     ),
     # Diglent Arty running VexRiscv 32-bit with:
     # - AXI-Lite Bus.
@@ -76,6 +78,8 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:arty"],
     ),
     # Diglent Arty running VexRiscv 32-bit with:
     # - AXI Bus.
@@ -99,5 +103,7 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB1",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:arty"],
     ),
 }
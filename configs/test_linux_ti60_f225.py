@@ -6,7 +6,7 @@
 # Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
 # SPDX-License-Identifier: BSD-2-Clause
 
-from litex_hw_ci import LiteXCIConfig, LiteXCITest
+from litex_hw_ci import LiteXCIConfig, LiteXCITest, bios_smoke_tests
 
 # LiteX CI Config Definitions ----------------------------------------------------------------------
 
@@ -14,7 +14,7 @@ from litex_hw_ci import LiteXCIConfig, LiteXCITest
 # Tested configs:
 # - VexRiscv 32-bit / Wishbone Bus.
 
-linux_build_args = "--clean --build --generate-dtb --prepare-tftp --copy-images"
+linux_build_args = "--build --cache --generate-dtb --copy-images"
 
 tests = [
     LiteXCITest(send="Q\n",                          sleep=1),
@@ -37,7 +37,9 @@ litex_ci_configs = {
         exit_command     = "",
         tty              = "/dev/ttyUSB2",
         tty_baudrate     = "4000000",
-        test_boot_json   = "/tftpboot/boot.json",
+        test_boot_json   = "{output_dir}/images/boot.json",
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
+        resources        = ["board:ti60_f225"],
     ),
 }
@@ -14,26 +14,32 @@ from litex_hw_ci import LiteXCIConfig, LiteXCITest, get_local_ip
 # - LiteX Acorn Mini on YKUSH Kit Port 1.
 # - Digilent Arty    on YKUSH Kit Port 2.
 # - Orange Crab      on YKUSH Kit Port 3.
+# - Each board only powers its own port and declares its board/port (and tty) as resources, so
+#   configs can run concurrently with --hardware-jobs (Acorn/Arty share /dev/ttyUSB1 and are
+#   serialized; use stable /dev/serial/by-id/ ttys to run them concurrently).
 
 litex_ci_configs = {
     "acorn" : LiteXCIConfig(
         target           = "litex_acorn_baseboard_mini",
-        setup_command    = "ykushcmd -d a && ykushcmd -u 1 && sleep 5",
-        exit_command     = "ykushcmd -d a",
+        setup_command    = "ykushcmd -u 1 && sleep 5",
+        exit_command     = "ykushcmd -d 1",
         tty              = "/dev/ttyUSB1",
+        resources        = ["board:acorn", "ykush:1"],
     ),
     "arty" : LiteXCIConfig(
         target           = "digilent_arty",
-        setup_command    = "ykushcmd -d a && ykushcmd -u 2 && sleep 5",
-        exit_command     = "ykushcmd -d a",
+        setup_command    = "ykushcmd -u 2 && sleep 5",
+        exit_command     = "ykushcmd -d 2",
         tty              = "/dev/ttyUSB1",
+        resources        = ["board:arty", "ykush:2"],
     ),
     "orangecrab" : LiteXCIConfig(
         target           = "gsd_orangecrab",
         gateware_command = f"--without-dfu-rst",
-        setup_command    = "ykushcmd -d a && ykushcmd -u 3 && sleep 5",
-        exit_command     = "ykushcmd -d a",
+        setup_command    = "ykushcmd -u 3 && sleep 5",
+        exit_command     = "ykushcmd -d 3",
         tty              = "/dev/ttyACM0",
         test_delay       = 5,
+        resources        = ["board:orangecrab", "ykush:3"],
     ),
 }
@@ -6,7 +6,7 @@
 # Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
 # SPDX-License-Identifier: BSD-2-Clause
 
-from litex_hw_ci import LiteXCIConfig, LiteXCITest, get_local_ip
+from litex_hw_ci import LiteXCIConfig, LiteXCITest, bios_smoke_tests, get_local_ip
 
 # LiteX CI Config Definitions ----------------------------------------------------------------------
 
@@ -36,5 +36,6 @@ litex_ci_configs = {
         tty              = "/dev/ttyUSB1",
         tty_baudrate     = 1000000,
         tests            = tests,
+        smoke_tests      = bios_smoke_tests,
     ),
 }
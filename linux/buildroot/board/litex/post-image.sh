@@ -5,7 +5,8 @@ set -euo pipefail
 BOARD_DIR="$(dirname "$0")"
 GENIMAGE_CFG="${BOARD_DIR}/genimage.cfg"
 GENIMAGE_TMP="${BUILD_DIR}/genimage.tmp"
-LINUX_ON_LITEX_DIR="${BR2_EXTERNAL_LITEX_PATH}/../images"
+# Images staging directory (per CPU type workspace when provided by make.py).
+LINUX_ON_LITEX_DIR="${LITEX_IMAGES_DIR:-${BR2_EXTERNAL_LITEX_PATH}/../images}"
 
 # Define binary destinations.
 DST_DTB="${LINUX_ON_LITEX_DIR}/soc.dtb"
@@ -9,7 +9,9 @@
 import os
 import sys
 import json
+import fcntl
 import shutil
+import hashlib
 import argparse
 import subprocess
 import contextlib
@@ -38,19 +40,48 @@ def switch_dir(path):
         # Restore the orignal directory.
         os.chdir(original_dir)
 
+def lock_file(path):
+    # Exclusive lock on path (waiting for concurrent make.py processes), held until file is closed.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    f = open(path, "w")
+    fcntl.flock(f, fcntl.LOCK_EX)
+    return f
+
 # Linux Build --------------------------------------------------------------------------------------
 
 buildroot_url = "http://github.com/buildroot/buildroot"
-tftp_root     = "/tftpboot"
-motd_path     = "buildroot/board/litex/rootfs_overlay/etc/motd"
-
-def linux_clean():
-    if os.path.exists("third_party/buildroot"):
-        with switch_dir("third_party/buildroot"):
+tftp_root     = os.environ.get("LITEX_HW_CI_TFTP_ROOT", "/tftpboot") # build_<name>/images/ with LiteX HW CI TFTP server.
+workspace_dir = "build"
+dl_dir        = "third_party/dl"
+ccache_dir    = "third_party/ccache"
+cache_dir     = "third_party/cache"
+cache_images  = ["Image", "rootfs.cpio", "opensbi.bin"]
+
+# Per CPU Type Workspace (Buildroot output, motd overlay and images staging), allowing concurrent
+# builds of different CPU Types and incremental builds (toolchain, packages) across configs. Builds of
+# the same CPU Type are serialized on the workspace's lock.
+def get_workspace(cpu_type):
+    return cpu_type
+
+def get_lock_path(workspace):
+    return os.path.abspath(os.path.join(workspace_dir, f"{workspace}.lock"))
+
+def get_output_dir(workspace):
+    return os.path.abspath(os.path.join(workspace_dir, workspace, "buildroot"))
+
+def get_overlay_dir(workspace):
+    return os.path.abspath(os.path.join(workspace_dir, workspace, "rootfs_overlay"))
+
+def get_staging_dir(workspace):
+    return os.path.abspath(os.path.join(workspace_dir, workspace, "images"))
+
+def linux_clean(workspace):
+    if os.path.exists(os.path.join(get_output_dir(workspace), "Makefile")):
+        with switch_dir(get_output_dir(workspace)):
            return subprocess.run(["make", "clean"]).returncode
     return 0
 
-def linux_generate_motd(cpu_type):
+def linux_generate_motd(cpu_type, workspace):
     linux_on_litex_ascii_art = """
    __   _                                  __   _ __      _  __
   / /  (_)__  __ ____ _________  ___  ____/ /  (_) /____ | |/_/
@@ -66,35 +97,88 @@ def linux_generate_motd(cpu_type):
     motd_content.append("")
     motd_content = "\n".join(motd_content)
 
-    # Write Motd Content to file.
+    # Write Motd Content to file (in Workspace's overlay).
+    motd_path = os.path.join(get_overlay_dir(workspace), "etc", "motd")
     os.makedirs(os.path.dirname(motd_path), exist_ok=True)
     with open(motd_path, "w") as motd_file:
         motd_file.write(motd_content)
 
-def linux_build(cpu_type):
-    # Create Third-Party directory (if not present) and switch to it.
+def linux_configure_workspace(output_dir, overlay_dir, ccache_dir):
+    # Add Workspace's overlay to BR2_ROOTFS_OVERLAY and use shared ccache directory.
+    config_path = os.path.join(output_dir, ".config")
+    with open(config_path) as config_file:
+        config = config_file.read().splitlines()
+    for i, line in enumerate(config):
+        if line.startswith("BR2_ROOTFS_OVERLAY="):
+            overlays  = line.split("=", 1)[1].strip('"')
+            config[i] = f'BR2_ROOTFS_OVERLAY="{overlays} {overlay_dir}"'
+        if line.startswith("BR2_CCACHE_DIR="):
+            config[i] = f'BR2_CCACHE_DIR="{ccache_dir}"'
+    with open(config_path, "w") as config_file:
+        config_file.write("\n".join(config) + "\n")
+
+def linux_get_buildroot():
+    # Create Third-Party directory (if not present) and get Buildroot (cloned once: concurrent builds
+    # wait for the clone, a partial clone is never used).
     os.makedirs("third_party", exist_ok=True)
-    with switch_dir("third_party"):
-        # Get Buildroot.
-        if not os.path.exists("buildroot"):
-            ret = os.system(f"git clone --depth 1 --single-branch -b master {buildroot_url}")
-            if ret != 0:
-                return ret
+    with lock_file(os.path.abspath(os.path.join("third_party", "buildroot.lock"))):
+        with switch_dir("third_party"):
+            if not os.path.exists("buildroot"):
+                shutil.rmtree("buildroot.tmp", ignore_errors=True)
+                ret = os.system(f"git clone --depth 1 --single-branch -b master {buildroot_url} buildroot.tmp")
+                if ret != 0:
+                    return ret
+                os.rename("buildroot.tmp", "buildroot")
+    return 0
+
+def linux_embeds_dtb(cpu_type):
+    # SoC DTB embedded in OpenSBI (FW_FDT_PATH): opensbi.bin is specific to the SoC.
+    with open(os.path.join("buildroot", "configs", f"litex_{cpu_type}_defconfig")) as defconfig:
+        return "FW_FDT_PATH" in defconfig.read()
+
+def linux_build(cpu_type, workspace):
+    output_dir  = get_output_dir(workspace)
+    overlay_dir = get_overlay_dir(workspace)
+    staging_dir = get_staging_dir(workspace)
+    shared_dirs = {"dl" : os.path.abspath(dl_dir), "ccache" : os.path.abspath(ccache_dir)}
+    embeds_dtb  = linux_embeds_dtb(cpu_type)
+
+    # Get Buildroot.
+    ret = linux_get_buildroot()
+    if ret != 0:
+        return ret
 
+    with switch_dir("third_party"):
         # Switch to Buildroot directory.
         with switch_dir("buildroot"):
             # Prepare env (LD_LIBRARY_PATH is forbidden).
-            env = os.environ
+            env = os.environ.copy()
             if "LD_LIBRARY_PATH" in env:
                 env.pop("LD_LIBRARY_PATH")
 
-            # Configure Buildroot.
-            ret = subprocess.run(f"make BR2_EXTERNAL=../../buildroot/ litex_{cpu_type}_defconfig", shell=True, env=env)
+            # Share downloads between workspaces and stage images in Config's workspace.
+            env["BR2_DL_DIR"]       = shared_dirs["dl"]
+            env["LITEX_IMAGES_DIR"] = staging_dir
+
+            # Configure Buildroot (Out-of-tree in Config's workspace).
+            ret = subprocess.run(f"make O={output_dir} BR2_EXTERNAL=../../buildroot/ litex_{cpu_type}_defconfig", shell=True, env=env)
+            if ret.returncode != 0:
+                return ret
+            linux_configure_workspace(output_dir, overlay_dir, shared_dirs["ccache"])
+            ret = subprocess.run(f"make O={output_dir} olddefconfig", shell=True, env=env)
             if ret.returncode != 0:
                 return ret
 
-            # Run Buildroot to generate Linux Images.
-            ret = subprocess.run("make", shell=True, env=env)
+            # Rebuild OpenSBI when embedding the DTB (staged DTB of the config being built).
+            if embeds_dtb:
+                ret = subprocess.run(f"make O={output_dir} opensbi-dirclean", shell=True, env=env)
+                if ret.returncode != 0:
+                    return ret
+
+            # Run Buildroot to generate Linux Images (packages jobs limited to LiteX HW CI's CPU budget
+            # share when provided).
+            jobs = os.environ.get("LITEX_HW_CI_JOBS")
+            ret  = subprocess.run(f"make O={output_dir}" + (f" BR2_JLEVEL={jobs}" if jobs else ""), shell=True, env=env)
 
             return ret.returncode
 
@@ -106,6 +190,10 @@ def linux_prepare_tftp(soc_json, tftp_root=tftp_root):
     if not os.path.exists(images_dir):
         return 1
 
+    # Images served in place (LiteX HW CI TFTP server): Nothing to copy.
+    if os.path.abspath(tftp_root) == os.path.abspath(images_dir):
+        return 0
+
     # Copy files to tftp directory.
     for filename in os.listdir(images_dir):
         try:
@@ -114,15 +202,15 @@ def linux_prepare_tftp(soc_json, tftp_root=tftp_root):
             return 1
     return 0
 
-def linux_copy_images(soc_json):
+def linux_copy_images(soc_json, workspace):
     base_dir   = os.path.dirname(soc_json)
     images_dir = os.path.join(base_dir, "images")
 
     # Create images directory.
     os.makedirs(images_dir, exist_ok=True)
 
-    # Path to boot.json within the images directory
-    boot_json_path = os.path.join("images", "boot.json")
+    # Path to boot.json within the images staging directory
+    boot_json_path = os.path.join(get_staging_dir(workspace), "boot.json")
 
     # Copy boot.json to images directory.
     try:
@@ -135,7 +223,7 @@ def linux_copy_images(soc_json):
         with open(boot_json_path, 'r') as json_file:
             json_content = json.load(json_file)
             for filename in json_content.keys():
-                src_path = os.path.join("images", filename)
+                src_path = os.path.join(get_staging_dir(workspace), filename)
                 dst_path = os.path.join(images_dir, filename)
                 try:
                     shutil.copyfile(src_path, dst_path)
@@ -146,6 +234,60 @@ def linux_copy_images(soc_json):
 
     return 0
 
+# Linux Cache --------------------------------------------------------------------------------------
+
+def linux_get_cache_key(cpu_type, workspace):
+    sha256 = hashlib.sha256()
+    sha256.update(cpu_type.encode())
+
+    # SoC DTB, when embedded in OpenSBI (FW_FDT_PATH): opensbi.bin is specific to the SoC.
+    if linux_embeds_dtb(cpu_type):
+        dtb = os.path.join(get_staging_dir(workspace), "soc.dtb")
+        if os.path.exists(dtb):
+            with open(dtb, "rb") as f:
+                sha256.update(f.read())
+
+    # Buildroot revision.
+    if os.path.exists("third_party/buildroot"):
+        ret = subprocess.run(["git", "rev-parse", "HEAD"], cwd="third_party/buildroot", capture_output=True, text=True)
+        sha256.update(ret.stdout.encode())
+
+    # External tree (defconfigs, board fragments, patches, rootfs_overlay).
+    for root, dirs, files in sorted(os.walk("buildroot")):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            sha256.update(path.encode())
+            with open(path, "rb") as f:
+                sha256.update(f.read())
+    return f"{cpu_type}-{sha256.hexdigest()}"
+
+def linux_restore_cache(key, workspace):
+    entry = os.path.join(cache_dir, key)
+    if not all(os.path.exists(os.path.join(entry, f)) for f in cache_images):
+        return 1
+    for filename in cache_images:
+        dst = os.path.join(get_staging_dir(workspace), filename)
+        # Images are symlinks to Buildroot outputs, remove them to avoid writing through.
+        if os.path.lexists(dst):
+            os.remove(dst)
+        if copy_file(os.path.join(entry, filename), dst) != 0:
+            return 1
+    return 0
+
+def linux_store_cache(key, workspace):
+    entry = os.path.join(cache_dir, key)
+    tmp   = entry + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for filename in cache_images:
+        if copy_file(os.path.join(get_staging_dir(workspace), filename), os.path.join(tmp, filename)) != 0:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return 1
+    shutil.rmtree(entry, ignore_errors=True)
+    os.rename(tmp, entry)
+    return 0
+
 # Device Tree --------------------------------------------------------------------------------------
 
 from litex.tools.litex_json2dts_linux import generate_dts as litex_generate_dts
@@ -211,15 +353,15 @@ def combine_dtb(soc_json, overlays=""):
 # DTB copy.
 # ---------
 
-def copy_dtb(soc_json):
+def copy_dtb(soc_json, workspace):
     base_dir = os.path.dirname(soc_json)
     dtb_in   = os.path.join(base_dir, "soc.dtb")
-    dtb_out  = os.path.join("images", "soc.dtb")
+    dtb_out  = os.path.join(get_staging_dir(workspace), "soc.dtb")
     ret = copy_file(dtb_in, dtb_out)
     if ret != 0:
         return ret
     dtb_in   = os.path.join(base_dir, "soc_combined.dtb")
-    dtb_out  = os.path.join("images", "soc_combined.dtb")
+    dtb_out  = os.path.join(get_staging_dir(workspace), "soc_combined.dtb")
     return copy_file(dtb_in, dtb_out)
 
 # Main ---------------------------------------------------------------------------------------------
@@ -253,6 +395,7 @@ def main():
     parser.add_argument("--prepare-tftp", action="store_true", help="Prepare/Copy Linux Images to TFTP root directory.")
     parser.add_argument("--copy-images",  action="store_true", help="Copy Linux Images to target build directory.")
     parser.add_argument("--prepare-only", action="store_true", help="Only prepare tftp. Assumes necessary binaries are already available.")
+    parser.add_argument("--cache",        action="store_true", help="Reuse Linux Images built from identical Buildroot inputs (skips clean/build on hit).")
 
     args = parser.parse_args()
 
@@ -295,11 +438,12 @@ def main():
             print(f"Error: unknown cpu_type {cpu_type}")
             return ErrorCode.CONFIG_ERROR
 
-    # Linux Clean.
-    # ------------
-    if args.clean:
-        if linux_clean() != 0:
-            return ErrorCode.CLEAN_ERROR
+    # Lock CPU Type's Workspace (until exit, same CPU Type builds serialized) and create its images
+    # staging directory.
+    workspace = get_workspace(cpu_type)
+    if args.generate_dtb or args.clean or args.build or args.copy_images:
+        workspace_lock = lock_file(get_lock_path(workspace))
+    os.makedirs(get_staging_dir(workspace), exist_ok=True)
 
     # Linux Device Tree Generation.
     # -----------------------------
@@ -309,9 +453,27 @@ def main():
             return ErrorCode.DTS_ERROR
         if combine_dtb(args.soc_json) != 0:
             return ErrorCode.DTS_ERROR
-        if copy_dtb(args.soc_json) != 0:
+        if copy_dtb(args.soc_json, workspace) != 0:
             return ErrorCode.DTS_ERROR
 
+    # Linux Cache.
+    # ------------
+    cache_hit = False
+    if args.cache and args.build:
+        # Key computed after DTB generation and Buildroot checkout (both part of the key).
+        if linux_get_buildroot() != 0:
+            return ErrorCode.BUILD_ERROR
+        cache_key = linux_get_cache_key(cpu_type, workspace)
+        cache_hit = (linux_restore_cache(cache_key, workspace) == 0)
+        if cache_hit:
+            print(f"Linux Images restored from cache ({cache_key}).")
+
+    # Linux Clean.
+    # ------------
+    if args.clean and not cache_hit:
+        if linux_clean(workspace) != 0:
+            return ErrorCode.CLEAN_ERROR
+
     #  Linux Build.
     # -------------
     if args.build:
@@ -322,16 +484,19 @@ def main():
             extra_name = "vexiiriscv_"
         else:
             extra_name = ""
-        if copy_file(f"images/boot_{extra_name}rootfs_{args.rootfs}.json", "images/boot.json") != 0:
-            return ErrorCode.BUILD_ERROR
-        linux_generate_motd(cpu_type)
-        if linux_build(cpu_type) != 0:
+        if copy_file(f"images/boot_{extra_name}rootfs_{args.rootfs}.json", os.path.join(get_staging_dir(workspace), "boot.json")) != 0:
             return ErrorCode.BUILD_ERROR
+        if not cache_hit:
+            linux_generate_motd(cpu_type, workspace)
+            if linux_build(cpu_type, workspace) != 0:
+                return ErrorCode.BUILD_ERROR
+            if args.cache:
+                linux_store_cache(cache_key, workspace)
 
     # Images Copy.
     # ------------
     if args.copy_images:
-        if linux_copy_images(soc_json=args.soc_json) != 0:
+        if linux_copy_images(soc_json=args.soc_json, workspace=workspace) != 0:
             return ErrorCode.COPY_ERROR
 
     # TFTP-Prepare.
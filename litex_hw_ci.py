@@ -11,15 +11,41 @@ import re
 import pty
 import time
 import enum
+import errno
+import signal
+import termios
+import json
+import sqlite3
+import statistics
+import codecs
+import asyncio
 import shlex
+import shutil
 import socket
+import hashlib
+import functools
+import tempfile
 import datetime
 import argparse
+import threading
+import contextlib
+import types
 import subprocess
+import importlib.util
+import importlib.metadata
+import concurrent.futures
 from pathlib import Path
 
 from jinja2 import Environment, FileSystemLoader
 
+from litex_hw_ci_worker import worker_request, wait_worker
+from litex_hw_ci_gateware import get_gateware_results, get_gateware_deltas
+from litex_hw_ci_triage import get_log_signatures, get_fingerprint, get_tokens, normalize_line
+from litex_hw_ci_log import LiteXCILogWriter, LiteXCILogEcho, LiteXCILogWatcher, get_compression, default_watchers
+from litex_hw_ci_tftp import LiteXCITFTPServer
+from litex_hw_ci_serialboot import LiteXCISerialBoot
+from litex_hw_ci_store import LiteXCIArtifactStore
+
 # Helpers ------------------------------------------------------------------------------------------
 
 def get_local_ip():
@@ -28,38 +54,784 @@ def get_local_ip():
 # LiteX CI Config Constants ------------------------------------------------------------------------
 
 class LiteXCIStatus(enum.IntEnum):
-    SUCCESS     = 0
-    BUILD_ERROR = 1
-    LOAD_ERROR  = 2
-    TEST_ERROR  = 3
-    NOT_RUN     = 4
+    SUCCESS      = 0
+    BUILD_ERROR  = 1
+    LOAD_ERROR   = 2
+    TEST_ERROR   = 3
+    NOT_RUN      = 4
+    SKIPPED      = 5
+    CARRIED_OVER = 6
 
 # LiteX CI Test ------------------------------------------------------------------------------------
 
 class LiteXCITest:
     def __init__(self, send="", keyword=None, timeout=5.0, sleep=0.0):
         self.send    = send
-        self.keyword = keyword
-        self.timeout = timeout
+        self.keyword = keyword # Literal, compiled regex (re.compile) or list of them (all must match).
+        self.timeout = timeout # Per-step deadline (from step start).
         self.sleep   = sleep
 
+    def get_name(self):
+        if self.keyword is None:
+            return f"send: {self.send.strip()}"
+        keywords = self.keyword if isinstance(self.keyword, (list, tuple)) else [self.keyword]
+        return " & ".join(k if isinstance(k, str) else k.pattern for k in keywords)
+
+# BIOS smoke tests: Quick BIOS checks gating the costly software build/tests (opt-in per config
+# with smoke_tests=bios_smoke_tests). Autoboot is aborted first (Q) so the board stays in the BIOS.
+bios_smoke_tests = [
+    LiteXCITest(send="reboot\n",                                          sleep=1),
+    LiteXCITest(send="Q\n",                                               sleep=1),
+    LiteXCITest(send="ident\n", keyword="Ident:"),
+    LiteXCITest(send="help\n",  keyword="LiteX BIOS, available commands"),
+]
+
+# LiteX CI Matcher ---------------------------------------------------------------------------------
+
+class LiteXCIMatcher:
+    """Streaming multi-pattern matcher with bounded memory.
+
+    Literals (and regexes) are combined in a single alternation regex scanned once per received
+    chunk; only a sliding window (sized to the longest literal or regex_window) is kept between
+    chunks. Regexes with named captures are matched on complete lines (captures not truncated),
+    other regexes also on the current partial line (ex: prompts). Patterns are matched once, named
+    captures of regexes are collected in captures.
+    """
+    def __init__(self, patterns, regex_window=256):
+        if not isinstance(patterns, (list, tuple)):
+            patterns = [patterns]
+        self.patterns = list(patterns)
+        self.pending  = list(range(len(self.patterns)))
+        self.captures = {}
+        self.window   = max([regex_window] + [len(p) for p in self.patterns if isinstance(p, str)])
+        self.tail     = ""
+        self.compile()
+
+    @property
+    def done(self):
+        return not self.pending
+
+    def get_group(self, i):
+        # Named group of regex i, flags scoped to it (global inline flags moved out of the pattern).
+        pattern = self.patterns[i]
+        text    = re.sub(r"^(?:\(\?[aiLmsux]+\))+", "", pattern.pattern)
+        flags   = "".join(f for f, v in [("i", re.I), ("m", re.M), ("s", re.S), ("x", re.X)] if pattern.flags & v)
+        return f"(?P<_p{i}>(?{flags}:{text}))" if flags else f"(?P<_p{i}>{text})"
+
+    def compile_regexes(self, indexes):
+        # Combined regex (index None), or regexes scanned separately when not combinable (ex:
+        # conflicting group names, backreferences).
+        if not indexes:
+            return []
+        try:
+            return [(None, re.compile("|".join(self.get_group(i) for i in indexes)))]
+        except re.error:
+            return [(i, self.patterns[i]) for i in indexes]
+
+    def compile(self):
+        # Combine pending literals/regexes in single regexes (one named group per pattern).
+        literals = [f"(?P<_p{i}>{re.escape(self.patterns[i])})" for i in self.pending if isinstance(self.patterns[i], str)]
+        regexes  = [i for i in self.pending if not isinstance(self.patterns[i], str)]
+        self.literals = re.compile("|".join(literals)) if literals else None
+        self.lines    = self.compile_regexes([i for i in regexes if self.patterns[i].groupindex])
+        self.streams  = self.compile_regexes([i for i in regexes if not self.patterns[i].groupindex])
+
+    def search(self, text, pos, endpos):
+        # First match as (pattern index, match) or None.
+        matches  = [(None, self.literals.search(text, pos))] if self.literals is not None else []
+        matches += [(i, r.search(text, pos))         for i, r in self.streams]
+        matches += [(i, r.search(text, pos, endpos)) for i, r in self.lines]
+        matches  = [(i, m) for i, m in matches if m is not None]
+        if not matches:
+            return None
+        i, match = min(matches, key=lambda m: m[1].start())
+        return (int(match.lastgroup[2:]) if i is None else i), match
+
+    def feed(self, data):
+        """Feed received data, returns index in data following the match completing the patterns (or None)."""
+        text   = self.tail + data
+        endpos = text.rfind("\n") + 1
+        pos    = 0
+        while self.pending:
+            result = self.search(text, pos, endpos)
+            if result is None:
+                break
+            i, match = result
+            pattern  = self.patterns[i]
+            if not isinstance(pattern, str):
+                captures = pattern.search(match.group(0))
+                self.captures.update(captures.groupdict() if captures else {})
+            self.pending.remove(i)
+            self.compile()
+            pos = match.start() + 1
+            if not self.pending:
+                return max(match.end() - len(self.tail), 0)
+        self.tail = text[-self.window:]
+        return None
+
+# LiteX CI Console ---------------------------------------------------------------------------------
+
+class LiteXCIConsole:
+    """Non-blocking console on a file descriptor, read from the asyncio event loop.
+
+    Received data is decoded incrementally, echoed/logged and fed to the matcher of expect(); data
+    received outside of expect() is buffered (up to max_pending) for the next one. Waits are
+    deadline-based so many consoles can be monitored from a single process. Received data is first
+    fed to the native serialboot (when set), consuming the BIOS replies while uploading.
+    """
+    def __init__(self, fd, log_file=None, echo=True, max_pending=65536, serialboot=None):
+        self.fd          = fd
+        self.log_file    = log_file
+        self.echo        = echo
+        self.serialboot  = serialboot
+        self.decoder     = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.data        = ""
+        self.max_pending = max_pending
+        self.matcher     = None
+        self.closed      = False
+        self.event    = asyncio.Event()
+        os.set_blocking(fd, False)
+
+    def open(self):
+        asyncio.get_running_loop().add_reader(self.fd, self.on_readable)
+
+    def close(self):
+        if not self.closed:
+            asyncio.get_running_loop().remove_reader(self.fd)
+            self.closed = True
+        self.event.set()
+
+    def on_readable(self):
+        try:
+            data = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b"" # EIO: Other side of the PTY closed.
+        if not data:
+            self.close()
+            return
+        if self.serialboot is not None:
+            data = self.serialboot.receive(data)
+            if not data:
+                return
+        data = self.decoder.decode(data)
+        if self.echo:
+            print(data, end="", flush=True)
+        if self.log_file is not None:
+            self.log_file.write(data)
+        self.receive(data)
+
+    def receive(self, data):
+        # Feed active matcher, keeping data following its match for the next one.
+        if self.matcher is not None and not self.matcher.done:
+            end = self.matcher.feed(data)
+            if end is None:
+                return
+            data = data[end:]
+            self.event.set()
+        self.data = (self.data + data)[-self.max_pending:]
+
+    def write(self, data):
+        data = bytes(data, "utf-8")
+        while data:
+            try:
+                data = data[os.write(self.fd, data):]
+            except BlockingIOError:
+                time.sleep(0.001)
+
+    async def expect(self, matcher, deadline):
+        loop = asyncio.get_running_loop()
+
+        # Feed matcher with pending data, then with data received until deadline.
+        self.event.clear()
+        self.matcher, data, self.data = matcher, self.data, ""
+        self.receive(data)
+        try:
+            while not matcher.done:
+                timeout = deadline - loop.time()
+                if (timeout <= 0) or self.closed:
+                    return False
+                self.event.clear()
+                try:
+                    await asyncio.wait_for(self.event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            return True
+        finally:
+            self.matcher = None
+
+# LiteX CI Serial ----------------------------------------------------------------------------------
+
+def open_serial(tty, baudrate):
+    """Open tty in raw mode at baudrate, returns a non-blocking file descriptor."""
+    speed = getattr(termios, f"B{int(baudrate)}", None)
+    if speed is None:
+        raise ValueError(f"Unsupported baudrate {baudrate}.")
+    fd = os.open(tty, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+    try:
+        iflag, oflag, cflag, lflag, ispeed, ospeed, cc = termios.tcgetattr(fd)
+        iflag &= ~(termios.IGNBRK | termios.BRKINT | termios.PARMRK | termios.ISTRIP |
+                   termios.INLCR  | termios.IGNCR  | termios.ICRNL  | termios.IXON)
+        oflag &= ~termios.OPOST
+        cflag &= ~(termios.CSIZE | termios.PARENB | termios.CSTOPB | termios.CRTSCTS)
+        cflag |=  (termios.CS8   | termios.CREAD  | termios.CLOCAL)
+        lflag &= ~(termios.ECHO  | termios.ECHONL | termios.ICANON | termios.ISIG | termios.IEXTEN)
+        cc[termios.VMIN]  = 0
+        cc[termios.VTIME] = 0
+        termios.tcsetattr(fd, termios.TCSANOW, [iflag, oflag, cflag, lflag, speed, speed, cc])
+        termios.tcflush(fd, termios.TCIOFLUSH)
+    except Exception:
+        os.close(fd)
+        raise
+    return fd
+
 # LiteX CI Helpers ---------------------------------------------------------------------------------
 
-def execute_command(command, log_path, shell=False):
-    log_path = Path(log_path)
-    with open(log_path, "w") as log_file:
-        if not shell:
-            command = shlex.split(command)
-        process = subprocess.Popen(command,
+def kill_process_tree(process, timeout=5.0):
+    # Terminate process and its children (process is the leader of its own session/group).
+    for sig in [signal.SIGTERM, signal.SIGKILL]:
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            process.wait(timeout=timeout)
+            return
+        except subprocess.TimeoutExpired:
+            pass
+
+def execute_command(command, log_path, shell=False, compression="none", echo_rate=None, watcher=None, sampler=None, env=None, pass_fds=()):
+    if not shell:
+        command = shlex.split(command)
+    process = subprocess.Popen(command,
+        stdout            = subprocess.PIPE,
+        stderr            = subprocess.STDOUT,
+        shell             = shell,
+        start_new_session = True,
+        env               = env,
+        pass_fds          = pass_fds,
+    )
+    # Sample memory usage of the process tree.
+    if sampler is not None:
+        sampler.start(process.pid)
+
+    # Stream output as binary chunks to (compressed) log and (rate limited) console echo.
+    echo = LiteXCILogEcho(rate=echo_rate)
+    with LiteXCILogWriter(log_path, compression=compression) as log:
+        try:
+            while True:
+                data = process.stdout.read1(65536)
+                if not data:
+                    break
+                echo.write(data)
+                log.write(data)
+                # Fail-fast on fatal log signature.
+                if (watcher is not None) and watcher.feed(data):
+                    kill_process_tree(process)
+                    message = f"\n[LiteX HW CI] Fatal {watcher.match[0]} signature: {watcher.match[1]}, process terminated.\n"
+                    echo.write(message.encode())
+                    log.write(message.encode())
+                    return False
+        except BaseException:
+            kill_process_tree(process)
+            raise
+        finally:
+            echo.close()
+            if sampler is not None:
+                process.wait()
+                sampler.stop()
+    return process.wait() == 0
+
+# LiteX CI Gateware Cache --------------------------------------------------------------------------
+
+# Packages whose revision affects generated gateware (LiteX ecosystem cores, BIOS libraries).
+gateware_cache_packages = [
+    "litex", "litex_boards", "migen",
+    "litedram", "liteeth", "litesata", "litespi", "litesdcard", "litepcie", "liteiclink", "litescope",
+    "pythondata_software_picolibc", "pythondata_software_compiler_rt",
+]
+
+# Vendor toolchains version commands/environment variables.
+gateware_cache_toolchains = {
+    "vivado"             : "vivado -version",
+    "yosys"              : "yosys -V",
+    "nextpnr-ecp5"       : "nextpnr-ecp5 --version",
+    "nextpnr-ice40"      : "nextpnr-ice40 --version",
+    "nextpnr-himbaechel" : "nextpnr-himbaechel --version",
+}
+gateware_cache_toolchains_env = ["EFINITY_HOME", "LITEX_ENV_VIVADO", "LITEX_ENV_ISE"]
+
+# Files restored on a cache hit.
+gateware_cache_extensions = [".bit", ".bin", ".svf", ".hex", ".fs", ".sof", ".rbf", ".jed"]
+gateware_cache_files      = ["soc.json", "csr.json", "gateware_results.json"]
+
+def get_command_output(command, cwd=None):
+    try:
+        return subprocess.run(shlex.split(command),
+            cwd    = cwd,
             stdout = subprocess.PIPE,
             stderr = subprocess.STDOUT,
             text   = True,
-            shell  = shell
-        )
-        for line in process.stdout:
-            print(line, end='')
-            log_file.write(line)
-    return process.wait() == 0
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def get_git_revision(path):
+    # Commit and local changes of the Git checkout containing path (None if not a Git checkout).
+    if not os.path.isdir(path):
+        return None
+    revision = get_command_output("git rev-parse HEAD", cwd=path)
+    if revision and "fatal" not in revision:
+        diff = get_command_output("git diff HEAD", cwd=path) or ""
+        return f"{revision}-{hashlib.sha256(diff.encode()).hexdigest()[:16]}"
+    return None
+
+@functools.lru_cache(maxsize=None)
+def get_package_revision(package):
+    spec = importlib.util.find_spec(package)
+    if spec is None or spec.origin is None:
+        return "not-installed"
+    # Git checkout (usual LiteX install): Use commit and local changes.
+    revision = get_git_revision(os.path.dirname(spec.origin))
+    if revision is not None:
+        return revision
+    # Installed package: Use package version.
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+@functools.lru_cache(maxsize=None)
+def get_cross_compilers_versions():
+    # Versions of the cross-compilers (<triple>-gcc) found in PATH (BIOS built into the ROM).
+    versions = {}
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith("-gcc") or name.count("-") < 2 or name in versions:
+                continue
+            # Skip compiler cache wrappers (same compiler further in PATH).
+            if os.path.basename(os.path.realpath(os.path.join(directory, name))) == "ccache":
+                continue
+            versions[name] = (get_command_output(f"{os.path.join(directory, name)} --version") or "").split("\n")[0]
+    return versions
+
+@functools.lru_cache(maxsize=None)
+def get_gateware_revisions():
+    revisions = {}
+    for package in gateware_cache_packages:
+        revisions[package] = get_package_revision(package)
+    for toolchain, command in gateware_cache_toolchains.items():
+        revisions[toolchain] = get_command_output(command)
+    for env in gateware_cache_toolchains_env:
+        revisions[env] = os.environ.get(env)
+    revisions["cross_compilers"] = get_cross_compilers_versions()
+    return revisions
+
+def get_cpu_type(gateware_command):
+    # CPU type of a gateware command (LiteX default: VexRiscv).
+    m = re.search(r"--cpu-type[= ](\S+)", gateware_command)
+    return m.group(1) if m else "vexriscv"
+
+class LiteXCIGatewareCache:
+    def __init__(self, path, max_size=20e9):
+        self.path     = Path(path)
+        self.max_size = max_size
+        self.lock     = threading.Lock()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def get_key(self, target, gateware_command):
+        key = {
+            "target"           : target,
+            "gateware_command" : " ".join(shlex.split(gateware_command)),
+            "cpu"              : get_package_revision(f"pythondata_cpu_{get_cpu_type(gateware_command)}"),
+            "revisions"        : get_gateware_revisions(),
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def restore(self, key, output_dir):
+        entry = self.path / key
+        with self.lock:
+            if not entry.exists():
+                return False
+            # Mark entry as recently used.
+            os.utime(entry)
+            for src in entry.rglob("*"):
+                if src.is_file():
+                    dst = output_dir / src.relative_to(entry)
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(src, dst)
+        return True
+
+    def store(self, key, output_dir):
+        files  = [f for f in (output_dir / "gateware").rglob("*") if f.suffix in gateware_cache_extensions]
+        files += [output_dir / f for f in gateware_cache_files if (output_dir / f).exists()]
+        if not files:
+            return
+        with self.lock:
+            # Copy to a temporary entry and rename it, so a partial entry is never restored.
+            tmp = self.path / f"{key}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            for src in files:
+                dst = tmp / src.relative_to(output_dir)
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(src, dst)
+            shutil.rmtree(self.path / key, ignore_errors=True)
+            tmp.rename(self.path / key)
+            self.evict()
+
+    def evict(self):
+        # Remove Least Recently Used entries until cache fits in max_size.
+        entries = [e for e in self.path.iterdir() if e.is_dir() and not e.name.endswith(".tmp")]
+        sizes   = {e: sum(f.stat().st_size for f in e.rglob("*") if f.is_file()) for e in entries}
+        size    = sum(sizes.values())
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            if size <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            size -= sizes[entry]
+
+# LiteX CI Compiler Cache -------------------------------------------------------------------------
+
+# Cross-compilers wrapped by the compiler cache (<triple>-gcc/g++ found in PATH).
+compiler_cache_suffixes = ["-gcc", "-g++"]
+
+# Compiler cache results (ccache stats log counters).
+compiler_cache_hits   = {"direct_cache_hit", "preprocessed_cache_hit"}
+compiler_cache_misses = {"cache_miss"}
+
+def get_compiler_cache_stats(stats_log):
+    """Hits/misses/uncacheable compilations of a ccache stats log (None when not available), each
+    compilation being logged as "# <input file>" followed by its counters."""
+    stats   = {"hits": 0, "misses": 0, "uncacheable": 0}
+    entries = []
+    try:
+        with open(stats_log) as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("#"):
+                    entries.append(set())
+                elif line and entries:
+                    entries[-1].add(line)
+    except OSError:
+        return None
+    for counters in entries:
+        if counters & compiler_cache_hits:
+            stats["hits"] += 1
+        elif counters & compiler_cache_misses:
+            stats["misses"] += 1
+        else:
+            stats["uncacheable"] += 1
+    return stats
+
+class LiteXCICompilerCache:
+    """Managed ccache shared by the BIOS/firmware builds of all configs.
+
+    The cross-compilers found in PATH are wrapped through ccache symlinks (masquerade directory
+    prepended to PATH), so the LiteX software Makefiles use the cache without changes. The
+    build_<name>/ paths are hashed relative to the LiteX HW CI directory (base directory), so the
+    BIOS/libraries objects are shared between configs generating identical sources/headers. Each
+    step logs its compilations to its own stats log (hits/misses per config).
+    """
+    def __init__(self, path, max_size=5e9):
+        self.path     = Path(path).resolve()
+        self.max_size = max_size
+        self.ccache   = shutil.which("ccache")
+        self.bin_dir  = self.path / "bin"
+        if self.ccache is not None:
+            self.create_bin_dir()
+
+    def create_bin_dir(self):
+        # ccache symlinks named as the cross-compilers (ccache then runs the next one in PATH).
+        self.bin_dir.mkdir(parents=True, exist_ok=True)
+        for directory in os.environ.get("PATH", "").split(os.pathsep):
+            if not os.path.isdir(directory) or Path(directory).resolve() == self.bin_dir:
+                continue
+            for name in os.listdir(directory):
+                if not any(name.endswith(suffix) for suffix in compiler_cache_suffixes) or name.count("-") < 2:
+                    continue
+                link = self.bin_dir / name
+                if not link.exists() and not link.is_symlink():
+                    link.symlink_to(self.ccache)
+
+    def get_env(self, stats_log=None):
+        if self.ccache is None:
+            return {}
+        env = {
+            "PATH"             : f"{self.bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            "CCACHE_DIR"       : str(self.path / "ccache"),
+            "CCACHE_MAXSIZE"   : f"{self.max_size/1e9:.1f}G",
+            "CCACHE_BASEDIR"   : str(Path(__file__).parent.resolve()),
+            "CCACHE_NOHASHDIR" : "1",
+        }
+        if stats_log is not None:
+            env["CCACHE_STATSLOG"] = str(stats_log)
+        return env
+
+# LiteX CI Resources -------------------------------------------------------------------------------
+
+class LiteXCIResources:
+    """Lab resources (boards, ttys, YKUSH ports, /tftpboot, ...) manager.
+
+    Resources of a config are acquired all at once; a config without declared resources (None) is
+    exclusive (conflicts with all other configs). Waiting requests are granted in order: a request
+    is only granted when its resources are free and don't conflict with an earlier waiting one.
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.held      = []
+        self.waiting   = []
+
+    @staticmethod
+    def conflict(a, b):
+        return (a.resources is None) or (b.resources is None) or bool(a.resources & b.resources)
+
+    def available(self, request):
+        if any(self.conflict(request, held) for held in self.held):
+            return False
+        for waiting in self.waiting:
+            if waiting is request:
+                return True
+            if self.conflict(request, waiting):
+                return False
+        return True
+
+    @contextlib.contextmanager
+    def hold(self, resources):
+        # Requests are compared by identity (several requests can have the same resources).
+        request = types.SimpleNamespace(resources=None if resources is None else set(resources))
+        with self.condition:
+            self.waiting.append(request)
+            self.condition.wait_for(lambda: self.available(request))
+            self.waiting = [waiting for waiting in self.waiting if waiting is not request]
+            self.held.append(request)
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.held = [held for held in self.held if held is not request]
+                self.condition.notify_all()
+
+# LiteX CI Build Scheduler -------------------------------------------------------------------------
+
+# Default memory estimates (in bytes) of build steps without memory profile.
+build_memory_estimates = {
+    "firmware_build" : 1e9,
+    "gateware_build" : 4e9,
+}
+
+def get_mem_available():
+    # Available memory (in bytes) from /proc/meminfo.
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1])*1024
+    except OSError:
+        pass
+    return None
+
+def get_process_group_rss(pgids):
+    # RSS (in bytes) of the processes of process groups from /proc.
+    rss = 0
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[2]) in pgids:
+            rss += int(fields[21])*os.sysconf("SC_PAGE_SIZE")
+    return rss
+
+class LiteXCIMemorySampler:
+    """Samples RSS of a step's process tree (its process group) from /proc and keeps its peak.
+
+    When pid_file is set, the process group of the pid it contains is also sampled (ex: Warm
+    Worker's forked child running the step, outside of the step's process group).
+    """
+    def __init__(self, estimate=0, period=1.0):
+        self.estimate = estimate
+        self.period   = period
+        self.pid_file = None
+        self.rss      = 0
+        self.peak     = 0
+        self.stopped  = threading.Event()
+
+    def get_pgids(self, pgid):
+        pgids = {pgid}
+        if self.pid_file is not None:
+            try:
+                pgids.add(int(Path(self.pid_file).read_text()))
+            except (OSError, ValueError):
+                pass
+        return pgids
+
+    def start(self, pgid):
+        def sample():
+            while not self.stopped.is_set():
+                self.rss  = get_process_group_rss(self.get_pgids(pgid))
+                self.peak = max(self.peak, self.rss)
+                self.stopped.wait(self.period)
+        self.stopped.clear()
+        self.thread = threading.Thread(target=sample, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.rss = 0
+
+class LiteXCIBuildScheduler:
+    """Memory-aware admission of build steps (firmware_build/gateware_build).
+
+    Peak RSS of each build is sampled and recorded in the history, giving a memory profile per
+    config/target used as estimate for the next builds. With admission enabled, a build is only
+    started when MemAvailable (minus reserve and the expected growth of the running builds) fits
+    its estimate; one build is always admitted when none is running.
+    """
+    def __init__(self, history=None, admission=False, reserve=2e9, period=5.0):
+        self.history   = history
+        self.admission = admission
+        self.reserve   = reserve
+        self.period    = period
+        self.condition = threading.Condition()
+        self.running   = []
+
+    def get_estimate(self, name, config, step):
+        estimate = None
+        if self.history is not None:
+            estimate = self.history.get_memory_profile(name, config.target, step)
+        return estimate or build_memory_estimates[step]
+
+    def get_available(self):
+        available = get_mem_available()
+        if available is None:
+            return float("inf")
+        return available - self.reserve - sum(max(s.estimate - s.rss, 0) for s in self.running)
+
+    def admitted(self, sampler):
+        return (not self.admission) or (not self.running) or (self.get_available() >= sampler.estimate)
+
+    @contextlib.contextmanager
+    def admit(self, name, config, step):
+        sampler = LiteXCIMemorySampler(estimate=self.get_estimate(name, config, step))
+        with self.condition:
+            if not self.admitted(sampler):
+                print(f"[LiteX HW CI] {name}: Waiting for memory to run {step} (estimate: {sampler.estimate/1e9:.1f}GB).")
+            # MemAvailable also changes outside of the builds: Re-evaluate periodically.
+            while not self.admitted(sampler):
+                self.condition.wait(timeout=self.period)
+            self.running.append(sampler)
+        config.memory_sampler = sampler
+        try:
+            yield sampler
+        finally:
+            config.memory_sampler = None
+            with self.condition:
+                self.running.remove(sampler)
+                self.condition.notify_all()
+            if (self.history is not None) and sampler.peak:
+                self.history.record_memory(name, config.target, step, sampler.peak)
+
+# LiteX CI Jobserver -------------------------------------------------------------------------------
+
+# Default jobs held per build step: Tokens of the CPU budget (int) or share of the budget (float).
+# BIOS/firmware makes join the jobserver (remaining tokens), Toolchains/Buildroot get their share.
+default_build_jobs = {
+    "firmware_build" : 1,
+    "gateware_build" : 0.5,
+    "software_build" : 0.5,
+}
+
+# Default toolchain threads arguments (limited to the jobs held by the gateware build) per toolchain.
+default_threads_args = {
+    "vivado" : "--vivado-max-threads={jobs}",
+}
+
+@functools.lru_cache(maxsize=None)
+def get_target_toolchain(target, gateware_command):
+    # Toolchain of the gateware command (--toolchain), else default toolchain of target's platform.
+    m = re.search(r"--toolchain[= ](\S+)", gateware_command)
+    if m is not None:
+        return m.group(1)
+    try:
+        spec = importlib.util.find_spec(f"litex_boards.targets.{target}")
+        with open(spec.origin) as f:
+            m = re.search(r"from litex_boards\.platforms import (\w+)", f.read())
+        spec = importlib.util.find_spec(f"litex_boards.platforms.{m.group(1)}")
+        with open(spec.origin) as f:
+            m = re.search(r"toolchain\s*=\s*[\"'](\w+)[\"']", f.read())
+        return m.group(1)
+    except (ImportError, ValueError, AttributeError, OSError):
+        return None
+
+def get_make_version():
+    m = re.search(r"GNU Make (\d+)\.(\d+)", get_command_output("make --version") or "")
+    return (int(m.group(1)), int(m.group(2))) if m else (0, 0)
+
+class LiteXCIJobserver:
+    """CPU budget shared by all steps, as a GNU make jobserver of jobs tokens.
+
+    Build steps hold their jobs tokens while running (acquired all at once, one step at a time, so
+    steps can't deadlock on partial acquisitions) and the make processes started by their commands
+    (BIOS, firmware, ...) join the jobserver through MAKEFLAGS: Their parallel jobs take the
+    remaining tokens, so total concurrent jobs stay within the budget whatever the number of configs
+    being built. Build systems not joining the jobserver (Buildroot, NuttX, toolchains threads) are
+    limited to the tokens held by their step (LITEX_HW_CI_JOBS).
+
+    The jobserver is a named FIFO with make >= 4.4 (inherited through any process), file
+    descriptors of a pipe with older versions (only inherited by direct children, make processes
+    started further down then run without parallel jobs).
+    """
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.lock = threading.Lock()
+        self.path = None
+        if get_make_version() >= (4, 4):
+            self.path = os.path.join(tempfile.gettempdir(), f"litex_hw_ci_jobserver_{os.getpid()}")
+            os.mkfifo(self.path)
+            self.read_fd = self.write_fd = os.open(self.path, os.O_RDWR)
+            self.fds     = ()
+            self.auth    = f"fifo:{self.path}"
+        else:
+            self.read_fd, self.write_fd = os.pipe()
+            self.fds     = (self.read_fd, self.write_fd)
+            self.auth    = f"{self.read_fd},{self.write_fd}"
+        os.write(self.write_fd, b"+"*jobs)
+
+    def get_jobs(self, jobs):
+        # Share of the budget (float) or tokens (int).
+        if isinstance(jobs, float):
+            jobs = round(jobs*self.jobs)
+        return max(min(jobs, self.jobs), 1)
+
+    def get_env(self, jobs, makeflags=True):
+        env = os.environ.copy()
+        env["LITEX_HW_CI_JOBS"] = str(jobs)
+        if makeflags:
+            env["MAKEFLAGS"] = f"-j{self.jobs} --jobserver-auth={self.auth}"
+        return env
+
+    @contextlib.contextmanager
+    def acquire(self, jobs):
+        jobs   = self.get_jobs(jobs)
+        tokens = b""
+        with self.lock:
+            while len(tokens) < jobs:
+                tokens += os.read(self.read_fd, jobs - len(tokens))
+        try:
+            yield jobs
+        finally:
+            os.write(self.write_fd, tokens)
+
+    def close(self):
+        os.close(self.read_fd)
+        if self.path is not None:
+            os.remove(self.path)
+        else:
+            os.close(self.write_fd)
 
 # LiteX CI Config ----------------------------------------------------------------------------------
 
@@ -69,10 +841,16 @@ class LiteXCIConfig:
         software_command = "",
         setup_command    = "",
         exit_command     = "",
-        tty              = "", tty_baudrate=115200,
+        tty              = "", tty_baudrate=115200, tty_backend="native",
+        tftp_ip          = None,
         test_delay       = 0,
-        test_boot_json   = None,
+        test_boot_json   = None, serialboot="native",
         tests            = [LiteXCITest(send="reboot", keyword="Memtest OK", timeout=5.0)],
+        smoke_tests      = None,
+        watchers         = default_watchers,
+        resources        = None,
+        build_jobs       = default_build_jobs,
+        threads_args     = None,
     ):
         # Target Parameters.
         self.target           = target
@@ -86,11 +864,51 @@ class LiteXCIConfig:
         # TTY Parameters.
         self.tty              = tty
         self.tty_baudrate     = tty_baudrate
+        self.tty_backend      = tty_backend # "native" or "litex_term" (always used for serialboot).
+
+        # TFTP Parameters (Board IP, defaults to --eth-ip of gateware_command).
+        self.tftp_ip          = tftp_ip
+        self.tftp_server      = None
+
+        # Lab Resources (ex: ["board:arty", "ykush:2"]), None: Exclusive use of the lab.
+        self.resources        = resources
 
         # Tests.
         self.test_delay       = test_delay
-        self.test_boot_json   = test_boot_json
+        self.test_boot_json   = test_boot_json # Can refer to {output_dir} (ex: "{output_dir}/images/boot.json").
+        self.serialboot       = serialboot # "native" or "litex_term" (serialboot of test_boot_json).
         self.tests            = tests
+        self.test_timings     = []
+
+        # Smoke Tests (after load, failure skips software_build/test, None: Disabled).
+        self.smoke_tests      = smoke_tests
+
+        # Failed Step (remaining steps are skipped).
+        self.failed_step      = None
+
+        # Gateware Results (resources/timings).
+        self.gateware_results = None
+
+        # Caches/Worker.
+        self.gateware_cache   = None
+        self.compiler_cache   = None
+        self.compiler_stats   = {} # Compiler Cache hits/misses per step.
+        self.worker           = None
+
+        # Logs.
+        self.log_compression  = "none"
+        self.log_echo_rate    = None
+        self.watchers         = watchers # Fatal log signature sets watched per step.
+        self.step_signatures  = {}       # Fatal log signature (set, line) matched per step.
+
+        # Memory Sampler (of the running build step).
+        self.memory_sampler   = None
+
+        # CPU Budget: Jobserver, jobs held per build step and toolchain threads arguments appended
+        # to the gateware_build command (ex: "--vivado-max-threads={jobs}").
+        self.jobserver        = None
+        self.build_jobs       = build_jobs
+        self.threads_args     = threads_args
 
     def set_name(self, name=""):
         assert not hasattr(self, "name")
@@ -98,29 +916,159 @@ class LiteXCIConfig:
         self.output_dir = Path(__file__).parent / f"build_{name}"
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-    def perform_step(self, step_name, command, log_filename_suffix, shell=False):
+    def get_resources(self):
+        # Declared resources and implicit ones (tty, /tftpboot), None when exclusive.
+        if self.resources is None:
+            return None
+        resources = set(self.resources)
+        if self.tty != "":
+            resources.add(f"tty:{self.tty}")
+        if self.tftp_server is not None:
+            resources.add(f"tftp:{self.get_tftp_ip()}")
+        elif "--prepare-tftp" in self.software_command:
+            resources.add("tftpboot")
+        return resources
+
+    def get_tftp_ip(self):
+        m = re.search(r"--eth-ip[= ](\S+)", self.gateware_command)
+        return self.tftp_ip or (m.group(1) if m else None)
+
+    @contextlib.contextmanager
+    def serve_tftp(self):
+        # Serve config's images (build_<name>/images/) to its board with the built-in TFTP server.
+        if (self.tftp_server is None) or (self.get_tftp_ip() is None):
+            yield
+            return
+        with self.tftp_server.serve(self.get_tftp_ip(), self.output_dir / "images"):
+            yield
+
+    @contextlib.contextmanager
+    def acquire_jobs(self, step):
+        # Hold step's jobs of the CPU budget, yielding execute_command's env/pass_fds for the step.
+        if (self.jobserver is None) or (step not in self.build_jobs):
+            yield {}
+            return
+        with self.jobserver.acquire(self.build_jobs[step]) as jobs:
+            # Buildroot/NuttX force their own -jN: They only get LITEX_HW_CI_JOBS.
+            yield {
+                "env"      : self.jobserver.get_env(jobs, makeflags=(step != "software_build")),
+                "pass_fds" : self.jobserver.fds,
+            }
+
+    def perform_step(self, step_name, command, log_filename_suffix, shell=False, env=None):
         log_path = self.output_dir / f"{log_filename_suffix}.rpt"
-        if execute_command(command, log_path, shell):
+        watcher  = LiteXCILogWatcher(self.watchers.get(log_filename_suffix, []))
+        # Warm Worker: Also sample the forked child running the step (pid reported in pid file).
+        pid_file = None
+        if (self.worker is not None) and (self.memory_sampler is not None):
+            pid_file = self.get_worker_pid_file(log_filename_suffix)
+            pid_file.unlink(missing_ok=True)
+            self.memory_sampler.pid_file = pid_file
+        with self.acquire_jobs(log_filename_suffix) as jobs:
+            if env is not None:
+                jobs["env"] = {**jobs.get("env", os.environ), **env}
+            success = execute_command(command, log_path, shell,
+                compression = self.log_compression,
+                echo_rate   = self.log_echo_rate,
+                watcher     = watcher,
+                sampler     = self.memory_sampler,
+                **jobs
+            )
+        if pid_file is not None:
+            pid_file.unlink(missing_ok=True)
+        if watcher.match is not None:
+            self.step_signatures[log_filename_suffix] = watcher.match
+        if success:
             return LiteXCIStatus.SUCCESS
         return getattr(LiteXCIStatus, f"{step_name.upper()}_ERROR")
 
+    def get_worker_pid_file(self, action):
+        return self.output_dir / f"{action}_worker.pid"
+
+    def get_target_command(self, action, command, build_args=""):
+        if self.worker is None:
+            return f"{command} {build_args}" if build_args else command
+        # Route LiteX-Boards target command through the Warm Elaboration Worker.
+        return f"python3 {Path(__file__).parent / 'litex_hw_ci_worker.py'} request \
+        --socket={self.worker} --action={action} --target={self.target} \
+        --output-dir={self.output_dir} --build-args={shlex.quote(build_args)} \
+        --pid-file={self.get_worker_pid_file(action)} -- {self.gateware_command}"
+
+    def perform_compile_step(self, command, step):
+        # Build step compiling the BIOS/firmware, through the Compiler Cache (when enabled).
+        if self.compiler_cache is None:
+            return self.perform_step("build", command, step)
+        stats_log = self.output_dir / f"{step}_ccache.log"
+        stats_log.unlink(missing_ok=True)
+        status = self.perform_step("build", command, step, env=self.compiler_cache.get_env(stats_log))
+        stats  = get_compiler_cache_stats(stats_log)
+        if stats is not None:
+            self.compiler_stats[step] = stats
+        return status
+
     def firmware_build(self):
         command = f"python3 -m litex_boards.targets.{self.target} {self.gateware_command} \
         --output-dir={self.output_dir} \
         --soc-json={self.output_dir}/soc.json \
         --build --no-compile-gateware"
-        return self.perform_step("build", command, "firmware_build")
+        return self.perform_compile_step(self.get_target_command("firmware_build", command), "firmware_build")
+
+    def restore_gateware(self):
+        # Restore Gateware from Cache (when available), return True on cache hit.
+        if self.gateware_cache is None:
+            return False
+        key = self.gateware_cache.get_key(self.target, self.gateware_command)
+        if not self.gateware_cache.restore(key, self.output_dir):
+            return False
+        with LiteXCILogWriter(self.output_dir / "gateware_build.rpt", compression="none") as log:
+            log.write(f"Gateware restored from cache (key: {key}).\n".encode())
+        self.load_gateware_results()
+        return True
 
     def gateware_build(self):
+        # Restore Gateware from Cache (when available).
+        if self.restore_gateware():
+            return LiteXCIStatus.SUCCESS
+
         command = f"python3 -m litex_boards.targets.{self.target} {self.gateware_command} \
         --output-dir={self.output_dir} \
         --build"
-        return self.perform_step("build", command, "gateware_build")
+        # Limit Toolchain Threads to the jobs held by the step (CPU Budget, default per toolchain).
+        build_args   = ""
+        threads_args = self.threads_args
+        if threads_args is None:
+            threads_args = default_threads_args.get(get_target_toolchain(self.target, self.gateware_command), "")
+        if (self.jobserver is not None) and threads_args:
+            jobs       = self.jobserver.get_jobs(self.build_jobs.get("gateware_build", 1))
+            build_args = threads_args.format(jobs=jobs)
+        status = self.perform_compile_step(self.get_target_command("gateware_build", command, build_args), "gateware_build")
+
+        # Extract Gateware Results from Toolchain Reports.
+        if status == LiteXCIStatus.SUCCESS:
+            self.gateware_results = get_gateware_results(self.output_dir, self.output_dir / "gateware_build.rpt")
+            with open(self.output_dir / "gateware_results.json", "w") as results_file:
+                json.dump(self.gateware_results, results_file, indent=4)
+
+        # Store Gateware to Cache.
+        if (self.gateware_cache is not None) and (status == LiteXCIStatus.SUCCESS):
+            self.gateware_cache.store(self.gateware_cache.get_key(self.target, self.gateware_command), self.output_dir)
+        return status
+
+    def load_gateware_results(self):
+        try:
+            with open(self.output_dir / "gateware_results.json") as results_file:
+                self.gateware_results = json.load(results_file)
+        except (OSError, ValueError):
+            self.gateware_results = None
 
     def software_build(self):
         if self.software_command == "":
             return LiteXCIStatus.NOT_RUN
-        r = self.perform_step("build", self.software_command.format(output_dir=self.output_dir), "software_build", shell=True)
+        # Built-in TFTP server: Images are prepared in and served from build_<name>/images/.
+        env = None
+        if self.tftp_server is not None:
+            env = {"LITEX_HW_CI_TFTP_ROOT": str(self.output_dir / "images")}
+        r = self.perform_step("build", self.software_command.format(output_dir=self.output_dir), "software_build", shell=True, env=env)
         return r
 
     def setup(self):
@@ -133,61 +1081,133 @@ class LiteXCIConfig:
         command = f"python3 -m litex_boards.targets.{self.target} {self.gateware_command} \
         --output-dir={self.output_dir} \
         --load"
-        return self.perform_step("load", command, "load")
+        status = self.perform_step("load", self.get_target_command("load", command), "load")
+
+        # Release SoC elaboration from Worker (no longer needed after load).
+        if self.worker is not None:
+            with open(os.devnull, "w") as devnull:
+                worker_request(self.worker, "release", self.target, shlex.split(self.gateware_command), output=devnull)
+        return status
+
+    def smoke(self):
+        if not self.smoke_tests:
+            return LiteXCIStatus.NOT_RUN
+        return asyncio.run(self.run_tests(self.smoke_tests, "smoke", boot=False))
 
     def test(self):
-        time.sleep(self.test_delay)
-        log_path = self.output_dir / f"test.rpt"
-        status = LiteXCIStatus.TEST_ERROR
+        with self.serve_tftp():
+            return asyncio.run(self.run_tests(self.tests, "test"))
+
+    def get_test_boot_json(self):
+        if not self.test_boot_json:
+            return None
+        return self.test_boot_json.format(output_dir=self.output_dir)
 
+    def open_litex_term(self, boot=True):
         # Prepare LiteX Term command.
         litex_term_command = f"litex_term {self.tty} --speed {self.tty_baudrate}"
-        if self.test_boot_json:
-            litex_term_command += f" --images={self.test_boot_json}"
+        if boot and self.test_boot_json:
+            litex_term_command += f" --images={self.get_test_boot_json()}"
             print(litex_term_command)
 
+        # Open a PTY Pair to communicate with LiteX Term.
+        main_fd, term_fd = pty.openpty()
+        process = subprocess.Popen(
+            shlex.split(litex_term_command),
+            stdin  = term_fd,
+            stdout = term_fd,
+            stderr = subprocess.STDOUT,
+            text   = True
+        )
+        os.close(term_fd)
+        return main_fd, process
+
+    def open_tty(self, boot=True):
+        # LiteX Term required for its serialboot (or when selected).
+        if (boot and self.test_boot_json and self.serialboot == "litex_term") or (self.tty_backend == "litex_term"):
+            return self.open_litex_term(boot)
+        # Native serial, directly on the TTY.
+        try:
+            return open_serial(self.tty, self.tty_baudrate), None
+        except (OSError, ValueError, termios.error) as e:
+            print(f"Native serial unavailable on {self.tty} ({e}), using LiteX Term.")
+            return self.open_litex_term(boot)
+
+    async def run_tests(self, tests, step="test", boot=True):
+        await asyncio.sleep(self.test_delay)
+        log_path = self.output_dir / f"{step}.rpt"
+        status = LiteXCIStatus.TEST_ERROR
+
         # Open log file.
         with open(log_path, "w") as log_file:
-            # Open a PTY Pair to communicate with LiteX Term.
-            main_fd, term_fd = pty.openpty()
-            process = subprocess.Popen(
-                shlex.split(litex_term_command),
-                stdin  = term_fd,
-                stdout = term_fd,
-                stderr = subprocess.STDOUT,
-                text   = True
-            )
-            os.close(term_fd)
+            # Open TTY (Native serial or LiteX Term through a PTY, serialboot only when boot).
+            main_fd, process = self.open_tty(boot)
 
-            start_time = time.time()
+            loop       = asyncio.get_running_loop()
+            start_time = loop.time()
+            timings    = []
+            if step == "test":
+                self.test_timings = timings
 
+            serialboot = None
+            console    = None
             try:
+                # Native Serialboot of test_boot_json images (on native serial, images CRCs precomputed).
+                if boot and self.test_boot_json and (process is None):
+                    try:
+                        serialboot = LiteXCISerialBoot(main_fd, self.get_test_boot_json())
+                    except (OSError, ValueError, IndexError) as e:
+                        # Missing/invalid boot.json or images (ex: --test-only without software build).
+                        log_file.write(f"\n[LiteX HW CI] Serialboot error: {e}\n")
+                        return status
+                    serialboot.timings    = timings
+                    serialboot.start_time = start_time
+                    serialboot.log_file   = log_file
+
+                # Open Console on TTY.
+                console = LiteXCIConsole(main_fd, log_file=log_file, serialboot=serialboot)
+                console.open()
+
                 # Iterate on Tests.
-                for test in self.tests:
+                for test in tests:
+                    step_time = loop.time()
+                    timing    = {
+                        "name"  : test.get_name(),
+                        "start" : round(step_time - start_time, 3),
+                    }
+                    timings.append(timing)
 
                     # Send Commands.
-                    os.write(main_fd, bytes(test.send, "utf-8"))
+                    console.write(test.send)
 
-                    # Receive/Check Keywords.
+                    # Receive/Check Keywords (with per-step deadline).
                     if test.keyword is not None:
-                        _data = ""
-                        while time.time() - start_time < test.timeout:
-                            data = os.read(main_fd, 128).decode('utf-8', errors='replace')
-                            if data:
-                                print(data, end='', flush=True)
-                                log_file.write(data)
-                                _data += data
-                                if test.keyword in _data:
-                                    if test is self.tests[-1]:
-                                        status = LiteXCIStatus.SUCCESS
-                                    break
+                        matcher = LiteXCIMatcher(test.keyword)
+                        matched = await console.expect(matcher, deadline=step_time + test.timeout)
+                        timing["match"]   = round(loop.time() - start_time, 3) if matched else None
+                        timing["elapsed"] = round(loop.time() - step_time, 3)
+                        timing["status"]  = "OK" if matched else "TIMEOUT"
+                        if matched:
+                            if matcher.captures:
+                                timing["captures"] = matcher.captures
+                                log_file.write(f"\n[LiteX HW CI] Captures: {matcher.captures}\n")
+                            if test is tests[-1]:
+                                status = LiteXCIStatus.SUCCESS
+
                     # Sleep.
-                    time.sleep(test.sleep)
+                    await asyncio.sleep(test.sleep)
 
             finally:
+                if console is not None:
+                    console.close()
                 os.close(main_fd)
-                process.terminate()
-                process.wait()
+                if process is not None:
+                    process.terminate()
+                    process.wait()
+
+                # Write Test Timings sidecar.
+                with open(self.output_dir / f"{step}_timings.json", "w") as timings_file:
+                    json.dump(timings, timings_file, indent=4)
 
         return status
 
@@ -206,38 +1226,483 @@ def enum_to_str(enum_val):
         return enum_val.name
     return str(enum_val)
 
-def calculate_total_duration(report):
-    total_seconds    = sum(float(results.get('Duration', '0.00 seconds')[:-7]) for results in report.values())
+def format_duration(total_seconds):
     hours, remainder = divmod(total_seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
     return f"{int(hours)} hours, {int(minutes)} minutes, {int(seconds)} seconds"
 
-def generate_html_report(report, report_filename, steps, start_time, config_file):
-    # Prepare data for template.
-    for name, results in report.items():
-        for step in steps:
-            step_key = step.capitalize()
-            if step_key in results:
-                results[step_key] = enum_to_str(results[step_key])
-
-    # Summary generation.
-    tests_executed = sum(1 for results in report.values() if any(status != '-' for status in results.values()))
-    total_duration = calculate_total_duration(report)
-    summary = f"""
-    <strong>Config File:</strong> {config_file}<br>
+@functools.lru_cache(maxsize=None)
+def get_report_template(template):
+    # Templates are only loaded/compiled once per run.
+    env = Environment(loader=FileSystemLoader(searchpath='./'))
+    return env.get_template(template)
+
+def write_file_atomic(filename, content):
+    # Write to a temporary file in the same directory and rename it over the destination: Readers
+    # (browsers polling the report) never see a partially written file.
+    filename = Path(filename)
+    fd, tmp  = tempfile.mkstemp(dir=filename.parent, prefix=f".{filename.name}.")
+    try:
+        with os.fdopen(fd, 'w') as file:
+            file.write(content)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, filename)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+class LiteXCIReport:
+    """HTML report with its JSON state sidecar (<report>.json).
+
+    State is updated incrementally: Only the row of the updated config is re-rendered and the
+    total duration is adjusted by the config's duration delta. Files are written atomically and
+    only when their content changed.
+    """
+    def __init__(self, filename, names, steps, start_time, config_file, trends_filename=None):
+        self.filename        = Path(filename)
+        self.state_filename  = self.filename.with_suffix(".json")
+        self.trends_filename = trends_filename
+        self.steps          = steps
+        self.start_time     = start_time
+        self.config_file    = config_file
+        self.lock           = threading.Lock()
+        self.results        = {name: {step.capitalize(): "-" for step in steps} for name in names}
+        self.durations      = {}
+        self.total_duration = 0.0
+        self.rows           = {name: self.render_row(name) for name in names}
+        self.contents       = {}
+
+    def render_row(self, name):
+        template = get_report_template('html/report_row_template.html')
+        return template.render(name=name, results=self.results[name], steps=self.steps)
+
+    def update(self, name, step, status, start_time, timings=None, regression=None, gateware=None, signature=None, failure=None, reason=None, compiler=None):
+        with self.lock:
+            results = self.results[name]
+            results[step.capitalize()] = enum_to_str(status)
+            if timings is not None:
+                results["Timings"] = timings
+            if gateware is not None:
+                results["Gateware"] = gateware
+            if signature is not None:
+                results.setdefault("Signatures", {})[step.capitalize()] = signature
+            if failure is not None:
+                results.setdefault("Failures", {})[step.capitalize()] = failure
+            if regression is not None:
+                results.setdefault("Regressions", {})[step.capitalize()] = regression
+            if reason is not None:
+                results.setdefault("Reasons", {})[step.capitalize()] = reason
+            if compiler is not None:
+                results.setdefault("Compiler", {})[step.capitalize()] = compiler
+
+            # Update Timing.
+            duration = time.time() - start_time
+            self.total_duration += duration - self.durations.get(name, 0.0)
+            self.durations[name] = duration
+            results['Time']      = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start_time))
+            results['Duration']  = f"{duration:.2f} seconds"
+
+            # Re-render config's row and write report.
+            self.rows[name] = self.render_row(name)
+            self.write()
+
+    def write_file(self, filename, content):
+        # Skip rewrite when content is unchanged.
+        if self.contents.get(filename) == content:
+            return
+        write_file_atomic(filename, content)
+        self.contents[filename] = content
+
+    def write(self):
+        tests_executed = len(self.durations)
+        total_duration = format_duration(self.total_duration)
+
+        # JSON State.
+        state = {
+            "config_file"    : self.config_file,
+            "start_time"     : self.start_time,
+            "steps"          : self.steps,
+            "tests_executed" : tests_executed,
+            "total_duration" : self.total_duration,
+            "configs"        : self.results,
+        }
+        self.write_file(self.state_filename, json.dumps(state, indent=2))
+
+        # HTML Report.
+        summary = f"""
+    <strong>Config File:</strong> {self.config_file}<br>
     <strong>Tests Executed:</strong> {tests_executed}<br>
-    <strong>Start Time:</strong> {start_time}<br>
+    <strong>Start Time:</strong> {self.start_time}<br>
     <strong>Total Duration:</strong> {total_duration}
     """
+        if self.trends_filename is not None:
+            summary += f"""<br><strong>History:</strong> <a href="{Path(self.trends_filename).name}">Trends</a>
+    """
+        template = get_report_template('html/report_template.html')
+        self.write_file(self.filename, template.render(rows=self.rows.values(), steps=self.steps, summary=summary))
 
-    # Load and render template.
-    env = Environment(loader=FileSystemLoader(searchpath='./'))
-    template = env.get_template('html/report_template.html')
-    html_content = template.render(report=report, steps=steps, summary=summary)
+# LiteX CI History --------------------------------------------------------------------------------
+
+# Git checkouts of the software builds (relative to LiteX HW CI directory).
+software_revision_dirs = {
+    "litex_hw_ci" : ".",
+    "buildroot"   : "linux/third_party/buildroot",
+    "nuttx"       : "nuttx/third_party/nuttx",
+    "nuttx-apps"  : "nuttx/third_party/apps",
+}
+
+@functools.lru_cache(maxsize=None)
+def get_software_revisions():
+    revisions = {}
+    for name, path in software_revision_dirs.items():
+        revisions[name] = get_git_revision(Path(__file__).parent / path) or "not-present"
+    return revisions
 
-    # Write to file.
-    with open(report_filename, 'w') as file:
-        file.write(html_content)
+history_schema = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    config_file TEXT,
+    start_time  TEXT,
+    revisions   TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id     INTEGER REFERENCES runs(id),
+    config     TEXT,
+    name       TEXT,
+    status     TEXT,
+    duration   REAL,
+    regression REAL
+);
+CREATE TABLE IF NOT EXISTS boot_steps (
+    run_id     INTEGER REFERENCES runs(id),
+    config     TEXT,
+    name       TEXT,
+    status     TEXT,
+    duration   REAL,
+    regression REAL
+);
+CREATE TABLE IF NOT EXISTS gateware (
+    run_id  INTEGER REFERENCES runs(id),
+    config  TEXT,
+    results TEXT
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    fingerprint TEXT PRIMARY KEY,
+    level       TEXT,
+    normalized  TEXT,
+    sample      TEXT
+);
+CREATE TABLE IF NOT EXISTS signature_tokens (
+    token       TEXT,
+    fingerprint TEXT,
+    PRIMARY KEY (token, fingerprint)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS signature_occurrences (
+    fingerprint TEXT,
+    run_id      INTEGER REFERENCES runs(id),
+    config      TEXT,
+    step        TEXT,
+    failed      INTEGER,
+    count       INTEGER
+);
+CREATE TABLE IF NOT EXISTS memory (
+    run_id   INTEGER REFERENCES runs(id),
+    config   TEXT,
+    target   TEXT,
+    step     TEXT,
+    peak_rss INTEGER
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    run_id      INTEGER REFERENCES runs(id),
+    config      TEXT,
+    fingerprint TEXT,
+    inputs      TEXT
+);
+CREATE INDEX IF NOT EXISTS steps_config                 ON steps(config, name);
+CREATE INDEX IF NOT EXISTS fingerprints_config          ON fingerprints(config, run_id);
+CREATE INDEX IF NOT EXISTS boot_steps_config            ON boot_steps(config, name);
+CREATE INDEX IF NOT EXISTS signature_occurrences_finger ON signature_occurrences(fingerprint, run_id);
+"""
+
+class LiteXCIHistory:
+    """SQLite store of all runs: Per-config/step status and duration, boot steps (test timings)
+    durations, gateware results (resources/timings), logs error/warning signatures, build steps
+    peak memory and gateware/software revisions of each run.
+
+    A successful step/boot step is flagged as a regression when its duration exceeds the median of
+    its last window successful durations (rolling baseline) by more than threshold (and min_delta
+    seconds, to ignore noise on short steps).
+    """
+    def __init__(self, path, window=10, threshold=0.2, min_delta=0.1):
+        self.window    = window
+        self.threshold = threshold
+        self.min_delta = min_delta
+        self.lock      = threading.Lock()
+        self.db        = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(history_schema)
+        self.run_id    = None
+
+    def start_run(self, config_file, start_time, revisions):
+        with self.lock, self.db:
+            cursor = self.db.execute("INSERT INTO runs (config_file, start_time, revisions) VALUES (?, ?, ?)",
+                (config_file, start_time, json.dumps(revisions, sort_keys=True)))
+            self.run_id = cursor.lastrowid
+
+    def get_baseline(self, table, config, name, status):
+        rows = self.db.execute(f"""
+            SELECT duration FROM {table}
+            WHERE config = ? AND name = ? AND status = ? AND run_id < ?
+            ORDER BY run_id DESC LIMIT ?""", (config, name, status, self.run_id, self.window)).fetchall()
+        return statistics.median(row[0] for row in rows) if rows else None
+
+    def get_regression(self, baseline, duration):
+        if baseline is None or duration is None:
+            return None
+        delta = duration - baseline
+        if delta > self.min_delta and delta > baseline*self.threshold:
+            return delta/baseline if baseline > 0 else float("inf")
+        return None
+
+    def record(self, table, config, name, status, duration, success):
+        # Record step and return its regression (relative duration increase vs baseline) if any.
+        regression = None
+        if status == success:
+            regression = self.get_regression(self.get_baseline(table, config, name, status), duration)
+        self.db.execute(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?)",
+            (self.run_id, config, name, status, duration, regression))
+        return regression
+
+    def record_step(self, config, step, status, duration, timings=None):
+        with self.lock, self.db:
+            regression = self.record("steps", config, step, enum_to_str(status), duration, success="SUCCESS")
+            # Test Step: Also record boot steps (steps with keyword), regressions are added to timings.
+            for timing in (timings or []):
+                if "elapsed" not in timing:
+                    continue
+                timing_regression = self.record("boot_steps", config, timing["name"],
+                    timing.get("status", "-"), timing.get("elapsed"), success="OK")
+                if timing_regression is not None:
+                    timing["regression"] = timing_regression
+        return regression
+
+    def record_gateware(self, config, results):
+        # Record gateware results and return the previous ones (None if first run).
+        with self.lock, self.db:
+            row = self.db.execute("""
+                SELECT results FROM gateware
+                WHERE config = ? AND run_id < ?
+                ORDER BY run_id DESC LIMIT 1""", (config, self.run_id)).fetchone()
+            self.db.execute("INSERT INTO gateware VALUES (?, ?, ?)", (self.run_id, config, json.dumps(results)))
+        return json.loads(row[0]) if row else None
+
+    def record_signatures(self, config, step, status, log_path, fatal=None):
+        # Index error/warning signatures of step's log. For failed steps, return the failure
+        # signature (fatal signature if any, else first error) with its earlier occurrences.
+        signatures = get_log_signatures(log_path)
+        failed     = status not in [LiteXCIStatus.SUCCESS, LiteXCIStatus.NOT_RUN]
+        with self.lock, self.db:
+            for fingerprint, signature in signatures.items():
+                self.db.execute("INSERT OR IGNORE INTO signatures VALUES (?, ?, ?, ?)",
+                    (fingerprint, signature["level"], signature["normalized"], signature["sample"]))
+                self.db.executemany("INSERT OR IGNORE INTO signature_tokens VALUES (?, ?)",
+                    [(token, fingerprint) for token in get_tokens(signature["normalized"])])
+                self.db.execute("INSERT INTO signature_occurrences VALUES (?, ?, ?, ?, ?, ?)",
+                    (fingerprint, self.run_id, config, step, failed, signature["count"]))
+            if not failed:
+                return None
+
+            # Failure Signature.
+            if fatal is not None:
+                fingerprint = get_fingerprint(normalize_line(fatal))
+            else:
+                fingerprint = next((f for f, signature in signatures.items() if signature["level"] == "error"), None)
+            if fingerprint is None:
+                return None
+
+            # Earlier Occurrences.
+            runs, configs = self.db.execute("""
+                SELECT COUNT(DISTINCT run_id), GROUP_CONCAT(DISTINCT config) FROM signature_occurrences
+                WHERE fingerprint = ? AND failed = 1 AND run_id < ?""", (fingerprint, self.run_id)).fetchone()
+        return {
+            "fingerprint" : fingerprint,
+            "runs"        : runs,
+            "configs"     : sorted((configs or "").split(",")) if configs else [],
+        }
+
+    def get_signatures(self, runs=30, level="error"):
+        # Signatures of failed steps in last runs, with number of configs/runs they occurred in.
+        with self.lock:
+            return self.db.execute("""
+                SELECT s.fingerprint, s.normalized, COUNT(DISTINCT o.config), COUNT(DISTINCT o.run_id)
+                FROM signature_occurrences o JOIN signatures s ON s.fingerprint = o.fingerprint
+                WHERE o.failed = 1 AND s.level = ? AND o.run_id > (SELECT COALESCE(MAX(id), 0) - ? FROM runs)
+                GROUP BY s.fingerprint ORDER BY COUNT(DISTINCT o.config) DESC""", (level, runs)).fetchall()
+
+    def find_signatures(self, query):
+        # Signatures from fingerprint or words (signatures containing all tokens of the words).
+        with self.lock:
+            rows = self.db.execute("SELECT fingerprint, normalized FROM signatures WHERE fingerprint = ?", (query,)).fetchall()
+            if rows:
+                return rows
+            tokens = get_tokens(query)
+            if not tokens:
+                return []
+            return self.db.execute(f"""
+                SELECT fingerprint, normalized FROM signatures WHERE fingerprint IN (
+                    SELECT fingerprint FROM signature_tokens WHERE token IN ({", ".join("?"*len(tokens))})
+                    GROUP BY fingerprint HAVING COUNT(*) = ?)""", (*tokens, len(tokens))).fetchall()
+
+    def get_signature_occurrences(self, fingerprint, runs=30):
+        with self.lock:
+            return self.db.execute("""
+                SELECT o.run_id, r.start_time, o.config, o.step, o.count
+                FROM signature_occurrences o JOIN runs r ON r.id = o.run_id
+                WHERE o.fingerprint = ? AND o.run_id > (SELECT COALESCE(MAX(id), 0) - ? FROM runs)
+                ORDER BY o.run_id DESC""", (fingerprint, runs)).fetchall()
+
+    def record_memory(self, config, target, step, peak_rss):
+        with self.lock, self.db:
+            self.db.execute("INSERT INTO memory VALUES (?, ?, ?, ?, ?)", (self.run_id, config, target, step, peak_rss))
+
+    def get_memory_profile(self, config, target, step, window=5):
+        # Max peak RSS of last window builds of config (or of target when config has no profile).
+        with self.lock:
+            for column, value in [("config", config), ("target", target)]:
+                row = self.db.execute(f"""
+                    SELECT MAX(peak_rss) FROM (SELECT peak_rss FROM memory
+                    WHERE {column} = ? AND step = ? ORDER BY run_id DESC LIMIT ?)""", (value, step, window)).fetchone()
+                if row[0] is not None:
+                    return row[0]
+        return None
+
+    def record_fingerprint(self, config, fingerprint, inputs):
+        # Record inputs fingerprint of a successful config run.
+        with self.lock, self.db:
+            self.db.execute("INSERT INTO fingerprints VALUES (?, ?, ?, ?)",
+                (self.run_id, config, fingerprint, json.dumps(inputs, sort_keys=True)))
+
+    def get_last_pass(self, config):
+        # Last successful run of config: (run_id, start_time, fingerprint, inputs) or None.
+        with self.lock:
+            row = self.db.execute("""
+                SELECT f.run_id, r.start_time, f.fingerprint, f.inputs FROM fingerprints f
+                JOIN runs r ON r.id = f.run_id
+                WHERE f.config = ? AND f.run_id < ?
+                ORDER BY f.run_id DESC LIMIT 1""", (config, self.run_id)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], row[2], json.loads(row[3])
+
+    def get_trends(self, config_file, runs=30):
+        # Durations of each config's steps/boot steps over the last runs of config_file (None when not run).
+        with self.lock:
+            run_ids = [row[0] for row in self.db.execute("""
+                SELECT id FROM runs WHERE config_file = ? ORDER BY id DESC LIMIT ?""", (config_file, runs))][::-1]
+            trends  = {}
+            for table in ["steps", "boot_steps"]:
+                rows = self.db.execute(f"""
+                    SELECT config, name, run_id, duration, regression FROM {table}
+                    WHERE run_id >= ? AND run_id IN (SELECT id FROM runs WHERE config_file = ?)
+                    ORDER BY rowid""", (run_ids[0] if run_ids else 0, config_file))
+                for config, name, run_id, duration, regression in rows:
+                    trend = trends.setdefault(config, {}).setdefault((table, name), {
+                        "name"       : name if table == "steps" else f"test: {name}",
+                        "durations"  : {},
+                        "regression" : None,
+                    })
+                    trend["durations"][run_id] = duration
+                    if run_id == run_ids[-1]:
+                        trend["regression"] = regression
+        for config in trends:
+            for trend in trends[config].values():
+                trend["durations"] = [trend["durations"].get(run_id) for run_id in run_ids]
+                trend["points"]    = get_trend_points(trend["durations"])
+                trend["last"]      = trend["durations"][-1]
+            trends[config] = list(trends[config].values())
+        return trends
+
+    def write_trends(self, filename, config_file):
+        template = get_report_template('html/trends_template.html')
+        write_file_atomic(filename, template.render(trends=self.get_trends(config_file), config_file=config_file))
+
+    def close(self):
+        self.db.close()
+
+def get_trend_points(durations, width=300, height=40):
+    # SVG polyline points of durations (missing runs skipped), scaled to width/height.
+    values = [duration for duration in durations if duration is not None]
+    if not values:
+        return ""
+    maximum = max(values) or 1
+    step    = width/max(len(durations) - 1, 1)
+    return " ".join(f"{i*step:.1f},{height - duration/maximum*height:.1f}"
+        for i, duration in enumerate(durations) if duration is not None)
+
+# LiteX CI Change Impact ---------------------------------------------------------------------------
+
+# Directories of the software trees not hashed (checkouts/build outputs, revisions used instead).
+impact_exclude_dirs = {"third_party", "build", "__pycache__"}
+
+@functools.lru_cache(maxsize=None)
+def get_tree_hash(path):
+    # Hash of the files (paths and contents) of a directory tree.
+    sha256 = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        # Prune excluded directories in place (not walked) and walk in sorted order.
+        dirs[:] = sorted(d for d in dirs if d not in impact_exclude_dirs)
+        for filename in sorted(files):
+            filepath = os.path.join(root, filename)
+            sha256.update(os.path.relpath(filepath, path).encode())
+            with open(filepath, "rb") as f:
+                while data := f.read(1024*1024):
+                    sha256.update(data)
+    return sha256.hexdigest()
+
+def get_file_hash(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except (OSError, TypeError):
+        return None
+
+def get_target_hash(target):
+    # Hash of LiteX-Boards target module source.
+    try:
+        spec = importlib.util.find_spec(f"litex_boards.targets.{target}")
+    except (ImportError, ValueError):
+        spec = None
+    return get_file_hash(spec.origin) if spec is not None else None
+
+def get_software_inputs(software_command):
+    # Software tree (directory of "cd <dir> && ...") and revisions of its checkouts.
+    m = re.match(r"\s*cd\s+(\S+)\s*&&", software_command)
+    if m is None:
+        return {}
+    directory = Path(__file__).parent / m.group(1)
+    inputs    = {"software_tree": get_tree_hash(directory) if directory.is_dir() else None}
+    for name, path in software_revision_dirs.items():
+        if Path(path).parts[:1] == Path(m.group(1)).parts[:1]:
+            inputs[name] = get_software_revisions()[name]
+    return inputs
+
+def get_config_inputs(config):
+    """Inputs a config's results depend on: Target module, commands/tests, LiteX/Migen/toolchains
+    revisions, CPU core (pythondata) revision and software tree/checkouts revisions."""
+    inputs = {
+        "target"           : config.target,
+        "target_source"    : get_target_hash(config.target),
+        "gateware_command" : " ".join(shlex.split(config.gateware_command)),
+        "software_command" : config.software_command,
+        "setup_command"    : config.setup_command,
+        "exit_command"     : config.exit_command,
+        "test_boot_json"   : get_file_hash(config.get_test_boot_json()),
+        "tests"            : [repr(vars(test)) for test in config.tests],
+        "smoke_tests"      : [repr(vars(test)) for test in config.smoke_tests or []],
+        "cpu"              : get_package_revision(f"pythondata_cpu_{get_cpu_type(config.gateware_command)}"),
+        **get_gateware_revisions(),
+        **get_software_inputs(config.software_command),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest(), inputs
 
 # LiteX CI Build/Test ------------------------------------------------------------------------------
 
@@ -258,33 +1723,116 @@ def list_configs(configs):
     for name in configs:
         print(f"- {name}")
 
-def run_config_tests(name, config, report, steps, report_filename, test_start_time, config_file, test_only):
-    # Format Name.
-    name = format_name(name)
-    config.set_name(name)
+# Steps only requiring the build host, that can run ahead of the hardware stage when pipelining.
+pipeline_build_steps = ["firmware_build", "gateware_build", "software_build"]
+
+def get_pipeline_build_steps(config, steps):
+    # software_build is kept in the hardware stage when preparing the shared /tftpboot (tftpboot
+    # resource held for the whole hardware stage); with images staged in build_<name>/ (built-in TFTP
+    # server, serialboot) it runs in the build stage (ahead of the smoke tests).
+    build_steps = pipeline_build_steps
+    if (config.tftp_server is None) and ("--prepare-tftp" in config.software_command):
+        build_steps = [step for step in build_steps if step != "software_build"]
+    return [step for step in steps if step in build_steps]
 
+def run_config_steps(name, config, steps, report, history, scheduler, start_times, test_only):
     # Run Config's Steps.
-    start_time = time.time()
+    start_time = start_times.setdefault(name, time.time())
     for step in steps:
+        # Skip remaining steps once a step failed (ex: smoke tests gating software_build/test).
+        if config.failed_step is not None:
+            report.update(name, step, LiteXCIStatus.SKIPPED, start_time, reason=f"{config.failed_step} failed")
+            continue
+        step_start_time = time.time()
         # When --test-only, skip compilation steps.
         if test_only and (step in ["firmware_build", "gateware_build"]):
             status = LiteXCIStatus.NOT_RUN
         elif test_only and (step in ["software_build"]):
             config.software_command += " --prepare-only"
             status = getattr(config, step)()
+        # Gateware restored from Cache: No build, no admission.
+        elif (step == "gateware_build") and config.restore_gateware():
+            status = LiteXCIStatus.SUCCESS
+        # Build steps: Run once admitted by scheduler (memory).
+        elif step in build_memory_estimates:
+            with scheduler.admit(name, config, step):
+                step_start_time = time.time()
+                status = getattr(config, step)()
         else:
             status = getattr(config, step)()
-        report[name][step.capitalize()] = enum_to_str(status)
-        update_report_timing(report, name, start_time)
-        generate_html_report(report, report_filename, steps, test_start_time, config_file)
+        timings    = config.test_timings if step == "test" else None
+        regression = None
+        if history is not None and status != LiteXCIStatus.NOT_RUN:
+            regression = history.record_step(name, step, status, time.time() - step_start_time, timings)
+        signature = config.step_signatures.get(step)
+        failure   = None
+        if history is not None and status != LiteXCIStatus.NOT_RUN:
+            failure = history.record_signatures(name, step, status, config.output_dir / f"{step}.rpt",
+                fatal = signature[1] if signature is not None else None)
+        gateware = None
+        if step == "gateware_build" and config.gateware_results is not None:
+            gateware = config.gateware_results
+            if history is not None:
+                gateware = get_gateware_deltas(gateware, history.record_gateware(name, gateware))
+        report.update(name, step, status, start_time,
+            timings    = timings,
+            regression = regression,
+            gateware   = gateware,
+            signature  = ": ".join(signature) if signature is not None else None,
+            failure    = failure,
+            compiler   = config.compiler_stats.get(step),
+        )
         if status not in [LiteXCIStatus.SUCCESS, LiteXCIStatus.NOT_RUN]:
-            break
+            config.failed_step = step
+    return config.failed_step is None
+
+def run_configs(configs, steps, run_steps, resources, depth=0, jobs=1):
+    # Serial: Run Configs' Steps in order.
+    if depth == 0 and jobs == 1:
+        for name, config in configs.items():
+            run_steps(name, config, steps)
+        return
+
+    # Hardware Stage: Run hardware steps once config is built, holding config's lab resources
+    # (configs with non-conflicting resources run concurrently, up to jobs configs).
+    def run_hardware_steps(name, config, build):
+        hardware_steps = [step for step in steps if step not in get_pipeline_build_steps(config, steps)]
+        # Build failed: Hardware steps are only reported as skipped (no resources needed).
+        if not build.result():
+            run_steps(name, config, hardware_steps)
+            return
+        with resources.hold(config.get_resources()):
+            run_steps(name, config, hardware_steps)
+
+    # Build Stage: Run build steps in background workers, up to depth configs ahead of the hardware
+    # stage (build of config N+depth submitted when config N enters the hardware stage).
+    names     = list(configs)
+    lookahead = max(depth, 1)
+    builds    = {}
+    submitted = {name: threading.Event() for name in names}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=lookahead) as build_executor, \
+         concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as hardware_executor:
+        def submit_build(index):
+            if index < len(names):
+                name = names[index]
+                build_steps  = get_pipeline_build_steps(configs[name], steps)
+                builds[name] = build_executor.submit(run_steps, name, configs[name], build_steps)
+                submitted[name].set()
+
+        def run_config_hardware_steps(index):
+            name = names[index]
+            submitted[name].wait()
+            try:
+                builds[name].exception()
+            finally:
+                submit_build(index + lookahead)
+            run_hardware_steps(name, configs[name], builds[name])
 
-def update_report_timing(report, name, start_time):
-    end_time = time.time()
-    duration = end_time - start_time
-    report[name]['Time']     = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start_time))
-    report[name]['Duration'] = f"{duration:.2f} seconds"
+        for index in range(lookahead):
+            submit_build(index)
+        runs = [hardware_executor.submit(run_config_hardware_steps, index) for index in range(len(names))]
+        for run in runs:
+            run.result()
 
 def main():
     parser = argparse.ArgumentParser(description="LiteX HW CI.")
@@ -293,6 +1841,28 @@ def main():
     parser.add_argument("--config",                          help="Select specific config from file (optional).")
     parser.add_argument("--list",       action="store_true", help="List all available configs in file and exit.")
     parser.add_argument("--test-only",  action="store_true", help="Run tests without compiling firmware, gateware, or software. Assumes necessary binaries are already available.")
+    parser.add_argument("--pipeline-depth", default=0, type=int, help="Build next configs in background (up to N configs ahead) while current config is on the board (0: Serial).")
+    parser.add_argument("--hardware-jobs",  default=1, type=int, help="Run hardware steps of up to N configs concurrently when their lab resources don't conflict.")
+    parser.add_argument("--memory-admission", action="store_true", help="Only start builds when available memory fits their memory profile (pipeline depth defaults to CPU count).")
+    parser.add_argument("--memory-reserve",   default=2, type=float, help="Memory kept free by memory admission (in GB).")
+    parser.add_argument("--cpu-budget",       default=0, type=int,   help="Total concurrent jobs of all builds (make jobserver shared by all configs, 0: Unlimited).")
+    parser.add_argument("--tftp-server",      action="store_true",   help="Serve boards netboot images from build_<name>/images/ with the built-in TFTP server (instead of /tftpboot).")
+    parser.add_argument("--tftp-port",        default=69, type=int,  help="Built-in TFTP server UDP port.")
+    parser.add_argument("--gateware-cache",                  help="Gateware cache directory, restores bitstreams when target/gateware_command/toolchains are unchanged (optional).")
+    parser.add_argument("--gateware-cache-size", default=20, type=float, help="Gateware cache maximum size (in GB).")
+    parser.add_argument("--compiler-cache",                  help="Compiler cache (ccache) directory shared by the BIOS/firmware builds of all configs (optional).")
+    parser.add_argument("--compiler-cache-size", default=5,  type=float, help="Compiler cache maximum size (in GB).")
+    parser.add_argument("--artifact-store",                  help="Artifact store directory, deduplicates build_<name>/ files with reflinks (optional).")
+    parser.add_argument("--artifact-store-runs", default=5,  type=int,   help="Artifact store: Keep artifacts referenced by the last N runs.")
+    parser.add_argument("--artifact-store-size", default=50, type=float, help="Artifact store: Maximum size of unreferenced artifacts (in GB).")
+    parser.add_argument("--artifact-store-age",  default=30, type=float, help="Artifact store: Maximum age of unreferenced artifacts (in days).")
+    parser.add_argument("--warm-worker", action="store_true", help="Keep LiteX imported and SoCs elaborated in a worker serving firmware_build/gateware_build/load.")
+    parser.add_argument("--history",     default="litex_hw_ci_history.db", help="SQLite database recording results of all runs (empty to disable).")
+    parser.add_argument("--changed-only", action="store_true", help="Only run configs whose inputs (target, commands, LiteX/CPU/software revisions) changed since their last successful run, others are carried over (requires history).")
+    parser.add_argument("--log-compression", default="none", choices=["none", "gzip", "zstd"], help="Steps logs compression (plain .rpt then only contains log tail).")
+    parser.add_argument("--log-echo-rate",   default=0,    type=int, help="Steps logs console echo rate limit (in KB/s, 0: Unlimited).")
+    parser.add_argument("--history-window",    default=10,  type=int,   help="Number of previous successful runs used as duration baseline.")
+    parser.add_argument("--history-threshold", default=0.2, type=float, help="Relative duration increase vs baseline flagged as regression.")
     args = parser.parse_args()
 
     # Set HTML Report File.
@@ -317,30 +1887,193 @@ def main():
         print(f"Error: config '{selected_config}' not found.")
         return
 
-    # Define Steps.
+    # Change Impact requires History (last successful runs).
+    if args.changed_only and not args.history:
+        print("Error: --changed-only requires --history.")
+        return
+
+    # Define Steps (Tiered: Gateware, then BIOS smoke tests on the board, then software/tests).
     steps = [
         "firmware_build",
         "gateware_build",
-        "software_build",
         "setup",
         "load",
+        "smoke",
+        "software_build",
         "test",
         "exit",
     ]
 
+    # Open History (Optional).
+    history         = None
+    trends_filename = None
+    if args.history:
+        history = LiteXCIHistory(args.history, window=args.history_window, threshold=args.history_threshold)
+        history.start_run(args.config_file, start_time, {**get_gateware_revisions(), **get_software_revisions()})
+        trends_filename = Path(args.report).with_name(f"{Path(args.report).stem}_trends.html")
+
     # Initialize Report.
-    report = {format_name(name): {step.capitalize(): LiteXCIStatus.NOT_RUN for step in steps} for name in litex_ci_configs}
+    report = LiteXCIReport(args.report,
+        names           = [format_name(name) for name in litex_ci_configs],
+        steps           = steps,
+        start_time      = start_time,
+        config_file     = args.config_file,
+        trends_filename = trends_filename,
+    )
     os.system("cp html/report.css ./")
-    generate_html_report(report, args.report, steps, start_time, args.config_file)
+    report.write()
+    if history is not None:
+        history.write_trends(trends_filename, args.config_file)
 
-    # Run Configs.
+    # Create Gateware Cache (Optional).
+    gateware_cache = None
+    if args.gateware_cache:
+        gateware_cache = LiteXCIGatewareCache(args.gateware_cache, max_size=args.gateware_cache_size*1e9)
+
+    # Create Compiler Cache (Optional).
+    compiler_cache = None
+    if args.compiler_cache:
+        compiler_cache = LiteXCICompilerCache(args.compiler_cache, max_size=args.compiler_cache_size*1e9)
+        if compiler_cache.ccache is None:
+            print("Warning: ccache not found, compiler cache disabled.")
+
+    # Create Artifact Store (Optional).
+    artifact_store = None
+    if args.artifact_store:
+        artifact_store = LiteXCIArtifactStore(args.artifact_store,
+            keep_runs = args.artifact_store_runs,
+            max_size  = args.artifact_store_size*1e9,
+            max_age   = args.artifact_store_age,
+        )
+        # Without reflinks, files would be copied to the store and left in place (doubled disk usage).
+        if artifact_store.link != "reflink":
+            print(f"Warning: {args.artifact_store} filesystem doesn't support reflinks (Btrfs, XFS, ...), artifact store disabled.")
+            artifact_store = None
+
+    # Create Jobserver (Optional).
+    jobserver = None
+    if args.cpu_budget:
+        jobserver = LiteXCIJobserver(args.cpu_budget)
+
+    # Start TFTP Server (Optional).
+    tftp_server = None
+    if args.tftp_server:
+        tftp_server = LiteXCITFTPServer(port=args.tftp_port)
+        try:
+            tftp_server.start()
+        except OSError as e:
+            # Ports < 1024 (default 69) require root/CAP_NET_BIND_SERVICE.
+            hint = ""
+            if e.errno == errno.EACCES:
+                hint = ", run with CAP_NET_BIND_SERVICE or use an unprivileged --tftp-port (with UDP 69 redirected to it)"
+            print(f"Error: TFTP server can't bind UDP port {args.tftp_port} ({e.strerror}){hint}.")
+            if jobserver is not None:
+                jobserver.close()
+            return
+
+    # Pipeline Depth (defaults to CPU count with memory admission).
+    depth = args.pipeline_depth or (os.cpu_count() if args.memory_admission else 0)
+
+    # Start Warm Elaboration Worker (Optional).
+    worker = None
+    if args.warm_worker:
+        worker_socket = os.path.join(tempfile.gettempdir(), f"litex_hw_ci_worker_{os.getpid()}.sock")
+        worker_env = jobserver.get_env(1) if jobserver is not None else os.environ.copy() # BIOS/firmware makes join the jobserver.
+        if compiler_cache is not None:
+            worker_env.update(compiler_cache.get_env()) # Compilers wrapped by the compiler cache.
+        # Elaborations retained for configs between build and load (builds ahead + configs on boards).
+        max_elaborations = max(depth, 1) + args.hardware_jobs
+        worker = subprocess.Popen(["python3", Path(__file__).parent / "litex_hw_ci_worker.py", "serve",
+            f"--socket={worker_socket}", f"--max-elaborations={max_elaborations}"],
+            env      = worker_env,
+            pass_fds = jobserver.fds if jobserver is not None else (),
+        )
+        if not wait_worker(worker_socket):
+            print("Error: warm elaboration worker failed to start.")
+            worker.terminate()
+            if jobserver is not None:
+                jobserver.close()
+            return
+
+    # Select Configs.
+    log_compression = get_compression(args.log_compression)
+    configs         = {}
     for name, config in litex_ci_configs.items():
         if selected_config and name != selected_config:
             continue
-        run_config_tests(name, config, report, steps, args.report, start_time, args.config_file, args.test_only)
+        config.set_name(format_name(name))
+        config.gateware_cache  = gateware_cache
+        config.compiler_cache  = compiler_cache
+        config.worker          = worker_socket if worker else None
+        config.log_compression = log_compression
+        config.log_echo_rate   = args.log_echo_rate*1024 if args.log_echo_rate else None
+        config.jobserver       = jobserver
+        config.tftp_server     = tftp_server
+        configs[format_name(name)] = config
+
+    # Fingerprint Configs' Inputs (recorded on success, compared to last success with --changed-only).
+    fingerprints = {}
+    if history is not None:
+        for name, config in configs.items():
+            fingerprints[name] = get_config_inputs(config)
+
+    # Change Impact: Carry over configs unchanged since their last successful run.
+    if args.changed_only:
+        for name in list(configs):
+            fingerprint, inputs = fingerprints[name]
+            last_pass = history.get_last_pass(name)
+            if last_pass is None:
+                print(f"[LiteX HW CI] {name}: no previous successful run.")
+                continue
+            run_id, run_start_time, last_fingerprint, last_inputs = last_pass
+            if fingerprint != last_fingerprint:
+                changed = sorted(k for k in inputs.keys() | last_inputs.keys() if inputs.get(k) != last_inputs.get(k))
+                print(f"[LiteX HW CI] {name}: changed since run {run_id} ({', '.join(changed)}).")
+                continue
+            print(f"[LiteX HW CI] {name}: unchanged since run {run_id}, carried over.")
+            del configs[name]
+            for step in steps:
+                report.update(name, step, LiteXCIStatus.CARRIED_OVER, time.time(),
+                    reason = f"Unchanged since run {run_id} ({run_start_time})")
+
+    # Run Configs.
+    start_times = {}
+    scheduler   = LiteXCIBuildScheduler(history, admission=args.memory_admission, reserve=args.memory_reserve*1e9)
+    def run_steps(name, config, steps):
+        success = run_config_steps(name, config, steps, report, history, scheduler, start_times, args.test_only)
+        # Store Config's Artifacts once its last step ran.
+        if (artifact_store is not None) and (steps[-1] == "exit"):
+            artifact_store.ingest(name, config.output_dir)
+        # Record Config's Inputs Fingerprint once fully built/tested successfully.
+        if (history is not None) and (steps[-1] == "exit") and (config.failed_step is None) and not args.test_only:
+            history.record_fingerprint(name, *fingerprints[name])
+        return success
+    try:
+        run_configs(configs, steps, run_steps,
+            resources = LiteXCIResources(),
+            depth     = depth,
+            jobs      = args.hardware_jobs,
+        )
+    finally:
+        # Stop Warm Elaboration Worker.
+        if worker is not None:
+            worker_request(worker_socket, "stop")
+            worker.wait()
+        # Close Jobserver.
+        if jobserver is not None:
+            jobserver.close()
+        # Stop TFTP Server.
+        if tftp_server is not None:
+            tftp_server.stop()
+        # Remove Artifacts no longer referenced.
+        if artifact_store is not None:
+            artifact_store.gc()
 
     # Finish Report.
-    generate_html_report(report, args.report, steps, start_time, args.config_file)
+    report.write()
+    if history is not None:
+        history.write_trends(trends_filename, args.config_file)
+        history.close()
 
 if __name__ == "__main__":
     main()
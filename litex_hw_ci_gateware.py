@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# LiteX HW CI Gateware Results.
+#
+# Extracts resources usage (LUT/FF/BRAM/DSP), worst negative slack and achieved Fmax per clock
+# domain from the toolchain reports/logs left by LiteX in build_<name>/: Vivado utilization/timing
+# reports, nextpnr logs/JSON reports and Efinity reports.
+
+import re
+import sys
+import json
+
+from pathlib import Path
+
+from litex_hw_ci_log import read_log
+
+# Constants ----------------------------------------------------------------------------------------
+
+# Vivado utilization report Site Types.
+vivado_resources = {
+    "Slice LUTs"      : "LUT",
+    "CLB LUTs"        : "LUT",
+    "Slice Registers" : "FF",
+    "CLB Registers"   : "FF",
+    "Block RAM Tile"  : "BRAM",
+    "DSPs"            : "DSP",
+}
+
+# nextpnr Bel types (ECP5, iCE40, Nexus, Gowin).
+nextpnr_resources = {
+    "TRELLIS_COMB" : "LUT",
+    "TRELLIS_FF"   : "FF",
+    "DP16KD"       : "BRAM",
+    "MULT18X18D"   : "DSP",
+    "ICESTORM_LC"  : "LUT",
+    "ICESTORM_RAM" : "BRAM",
+    "ICESTORM_DSP" : "DSP",
+    "OXIDE_COMB"   : "LUT",
+    "OXIDE_FF"     : "FF",
+    "OXIDE_EBR"    : "BRAM",
+    "EBR_CORE"     : "BRAM",
+    "MULT18_CORE"  : "DSP",
+    "LUT4"         : "LUT",
+    "DFF"          : "FF",
+    "BSRAM"        : "BRAM",
+    "MULT18X18"    : "DSP",
+}
+
+# Efinity place report Resource Summary entries.
+efinity_resources = {
+    "Logic Elements"       : "LUT",
+    "Logic Elements (LEs)" : "LUT",
+    "Registers"            : "FF",
+    "Memory Blocks"        : "BRAM",
+    "Multipliers"          : "DSP",
+}
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def read_text(filename):
+    try:
+        return Path(filename).read_text(errors="replace")
+    except OSError:
+        return ""
+
+def get_section(text, title):
+    # Lines of a report section, from its title (optionally "| " prefixed) to the next title.
+    title_regex = r"^\|?\s*([A-Z][\w ]+)$"
+    lines       = text.splitlines()
+    for i, line in enumerate(lines):
+        m = re.match(title_regex, line.rstrip())
+        if m and m.group(1).strip() == title:
+            section = []
+            for line in lines[i + 1:]:
+                if re.match(title_regex, line.rstrip()) and not line.startswith(" "):
+                    break
+                section.append(line)
+            return section
+    return []
+
+def add_resource(results, resource, used, available):
+    if resource not in results["resources"]:
+        results["resources"][resource] = {"used": used, "available": available}
+
+def add_clock(results, clock, fmax=None, wns=None, constraint=None):
+    results["clocks"][clock] = {"fmax": fmax, "wns": wns, "constraint": constraint}
+
+# Vivado -------------------------------------------------------------------------------------------
+
+def parse_vivado_utilization(results, text):
+    for line in text.splitlines():
+        cells = [cell.strip() for cell in line.split("|")]
+        if len(cells) < 5:
+            continue
+        resource  = vivado_resources.get(cells[1].rstrip("*").strip())
+        used      = to_float(cells[2])
+        available = to_float(cells[-3])
+        if resource is not None and used is not None:
+            # Used is the 1st column, Available/Util% the last ones (Fixed/Prohibited vary).
+            add_resource(results, resource, int(used), int(available) if available is not None else None)
+
+def parse_vivado_timing(results, text):
+    # Clocks periods.
+    periods = {}
+    for line in get_section(text, "Clock Summary"):
+        m = re.match(r"^\s*(\S+)\s+\{[\d.\s]+\}\s+([\d.]+)\s+([\d.]+)", line)
+        if m:
+            periods[m.group(1)] = float(m.group(2))
+
+    # Clocks WNS.
+    for line in get_section(text, "Intra Clock Table"):
+        m = re.match(r"^\s*(\S+)\s+(-?[\d.]+|NA)\s+", line)
+        if m and m.group(1) in periods:
+            period = periods[m.group(1)]
+            wns    = to_float(m.group(2))
+            fmax   = 1e3/(period - wns) if (wns is not None and period - wns > 0) else None
+            add_clock(results, m.group(1), fmax=fmax, wns=wns, constraint=1e3/period)
+
+def parse_vivado(results, gateware_dir):
+    for filename in sorted(gateware_dir.glob("*_utilization_place.rpt")):
+        parse_vivado_utilization(results, read_text(filename))
+    for filename in sorted(gateware_dir.glob("*_timing.rpt")):
+        parse_vivado_timing(results, read_text(filename))
+
+# nextpnr ------------------------------------------------------------------------------------------
+
+def parse_nextpnr_log(results, text):
+    # Device utilisation (last occurrence: after placement).
+    utilisation = {}
+    for m in re.finditer(r"^Info:\s+(\w+):\s+(\d+)\s*/\s*(\d+)\s+\d+%", text, re.MULTILINE):
+        utilisation[m.group(1)] = (int(m.group(2)), int(m.group(3)))
+    for bel, (used, available) in utilisation.items():
+        if bel in nextpnr_resources:
+            add_resource(results, nextpnr_resources[bel], used, available)
+
+    # Max frequency per clock (last occurrence: after routing).
+    regex = r"^Info: Max frequency for clock\s+'([^']+)':\s+([\d.]+) MHz \((?:PASS|FAIL) at ([\d.]+) MHz\)"
+    for m in re.finditer(regex, text, re.MULTILINE):
+        fmax, constraint = float(m.group(2)), float(m.group(3))
+        add_clock(results, m.group(1), fmax=fmax, wns=1e3/constraint - 1e3/fmax, constraint=constraint)
+
+def parse_nextpnr_report(results, report):
+    # nextpnr --report JSON.
+    for bel, utilization in report.get("utilization", {}).items():
+        if bel in nextpnr_resources:
+            add_resource(results, nextpnr_resources[bel], utilization["used"], utilization["available"])
+    for clock, fmax in report.get("fmax", {}).items():
+        achieved, constraint = fmax["achieved"], fmax["constraint"]
+        add_clock(results, clock, fmax=achieved, wns=1e3/constraint - 1e3/achieved, constraint=constraint)
+
+def parse_nextpnr(results, gateware_dir, log):
+    for filename in sorted(gateware_dir.glob("*.json")):
+        try:
+            report = json.loads(read_text(filename))
+        except ValueError:
+            continue
+        if isinstance(report, dict) and "fmax" in report and "utilization" in report:
+            parse_nextpnr_report(results, report)
+    if "nextpnr" in log:
+        parse_nextpnr_log(results, log)
+
+# Efinity ------------------------------------------------------------------------------------------
+
+def parse_efinity(results, gateware_dir):
+    for filename in sorted(gateware_dir.glob("outflow/*.place.rpt")):
+        for m in re.finditer(r"^\s*([\w ()]+?)\s*:\s*(\d+)\s*/\s*(\d+)", read_text(filename), re.MULTILINE):
+            if m.group(1) in efinity_resources:
+                add_resource(results, efinity_resources[m.group(1)], int(m.group(2)), int(m.group(3)))
+    for filename in sorted(gateware_dir.glob("outflow/*.timing.rpt")):
+        text = read_text(filename)
+        # Constraints periods (when reported).
+        periods = {}
+        for line in get_section(text, "Clock Constraints"):
+            m = re.match(r"^\s*(\S+)\s+([\d.]+)\s+([\d.]+)", line)
+            if m:
+                periods[m.group(1)] = float(m.group(2))
+        for line in get_section(text, "Maximum possible analyzed clocks frequency"):
+            m = re.match(r"^\s*(\S+)\s+([\d.]+)\s+([\d.]+)", line)
+            if m:
+                period = periods.get(m.group(1))
+                add_clock(results, m.group(1),
+                    fmax       = float(m.group(3)),
+                    wns        = (period - float(m.group(2))) if period is not None else None,
+                    constraint = 1e3/period if period is not None else None,
+                )
+
+# Gateware Results ---------------------------------------------------------------------------------
+
+def get_gateware_results(output_dir, log_filename=None):
+    """Resources/timings of the gateware built in output_dir (None when no report found)."""
+    output_dir   = Path(output_dir)
+    gateware_dir = output_dir / "gateware"
+    results      = {"resources": {}, "clocks": {}}
+    parse_vivado(results, gateware_dir)
+    parse_nextpnr(results, gateware_dir, read_log(log_filename).decode(errors="replace") if log_filename else "")
+    parse_efinity(results, gateware_dir)
+    if not results["resources"] and not results["clocks"]:
+        return None
+    wns = [clock["wns"] for clock in results["clocks"].values() if clock["wns"] is not None]
+    results["wns"] = min(wns, default=None)
+    return results
+
+def get_gateware_deltas(results, previous):
+    """Add deltas against previous results (resources used, clocks fmax/wns and design wns)."""
+    if results is None or previous is None:
+        return results
+    def delta(value, previous_value):
+        return None if (value is None or previous_value is None) else value - previous_value
+    for resource, usage in results["resources"].items():
+        usage["delta"] = delta(usage["used"], previous["resources"].get(resource, {}).get("used"))
+    for clock, timing in results["clocks"].items():
+        previous_timing = previous["clocks"].get(clock, {})
+        timing["fmax_delta"] = delta(timing["fmax"], previous_timing.get("fmax"))
+        timing["wns_delta"]  = delta(timing["wns"],  previous_timing.get("wns"))
+    results["wns_delta"] = delta(results["wns"], previous.get("wns"))
+    return results
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <build_dir> [gateware_build.rpt]")
+        return 1
+    results = get_gateware_results(*sys.argv[1:3])
+    print(json.dumps(results, indent=4))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
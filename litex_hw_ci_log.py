@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# LiteX HW CI Logs.
+#
+# Step logs are written compressed (gzip or zstd) as independent frames of frame_size uncompressed
+# bytes, with a JSON index (<log>.idx) of the frames offsets so any part of the log can be read
+# without decompressing it entirely. The last tail_size bytes are kept in memory and written to the
+# plain <step>.rpt log view linked from the report (refreshed every view_period seconds while the
+# step runs, so the log can be followed live). The full log can be decompressed on demand with
+# the cat command or served (decompressed on the fly) with the serve command. Log watchers scan the
+# stream for fatal signatures of the toolchains/build systems to stop failing steps early.
+
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import argparse
+import http.server
+import functools
+
+from pathlib import Path
+
+# Optional zstd support.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Constants ----------------------------------------------------------------------------------------
+
+log_compressions = {
+    "gzip" : ".gz",
+    "zstd" : ".zst",
+}
+
+def get_compression(compression):
+    # zstd requires zstandard package, fallback to gzip when not installed.
+    if compression == "zstd" and zstandard is None:
+        print("zstandard package not installed, using gzip log compression.")
+        return "gzip"
+    return compression
+
+def compress(compression, data):
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    return zstandard.ZstdCompressor(level=3).compress(data)
+
+def decompress(compression, data):
+    if compression == "gzip":
+        return gzip.decompress(data)
+    return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True).read()
+
+# Log Writer ---------------------------------------------------------------------------------------
+
+def remove_log(path):
+    # Remove log and its compressed versions/indexes (from previous runs).
+    for filename in [f"{path}"] + [f"{path}{extension}{suffix}" for extension in log_compressions.values() for suffix in ["", ".idx"]]:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+class LiteXCILogWriter:
+    def __init__(self, path, compression="gzip", frame_size=1 << 20, tail_size=64 << 10, view_period=2.0):
+        self.path        = Path(path)
+        self.compression = compression
+        self.frame_size  = frame_size
+        self.tail_size   = tail_size
+        self.view_period = view_period
+        self.view_time   = time.monotonic()
+        self.size        = 0
+        self.tail        = bytearray()
+        self.frame       = bytearray()
+        self.frames      = []
+        remove_log(self.path)
+        if compression == "none":
+            self.file = open(self.path, "wb")
+        else:
+            self.file = open(f"{self.path}{log_compressions[compression]}", "wb")
+            self.write_view()
+
+    def write(self, data):
+        self.size += len(data)
+        # Uncompressed Log (flushed every view_period seconds).
+        if self.compression == "none":
+            self.file.write(data)
+            if time.monotonic() - self.view_time >= self.view_period:
+                self.file.flush()
+                self.view_time = time.monotonic()
+            return
+        # Tail (trimmed when twice its size to amortize the copies).
+        self.tail += data
+        if len(self.tail) > 2*self.tail_size:
+            del self.tail[:-self.tail_size]
+        # Compressed Log.
+        self.frame += data
+        if len(self.frame) >= self.frame_size:
+            self.flush_frame()
+        # Live Log View.
+        if time.monotonic() - self.view_time >= self.view_period:
+            self.write_view()
+
+    def flush_frame(self):
+        if self.frame:
+            self.frames.append([self.size - len(self.frame), self.file.tell()])
+            self.file.write(compress(self.compression, bytes(self.frame)))
+            self.frame.clear()
+
+    def close(self):
+        if self.compression != "none":
+            self.flush_frame()
+            index = {
+                "compression" : self.compression,
+                "size"        : self.size,
+                "frames"      : self.frames,
+            }
+            with open(f"{self.file.name}.idx", "w") as index_file:
+                json.dump(index, index_file)
+            self.write_view()
+        self.file.close()
+
+    def write_view(self):
+        # Plain log view: Full log when fitting in tail, else its tail (replaced atomically).
+        self.view_time = time.monotonic()
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp, "wb") as view_file:
+            if self.size > self.tail_size:
+                tail = self.tail[-self.tail_size:]
+                tail = tail[tail.find(b"\n") + 1:] # Start on a full line.
+                view_file.write((f"[LiteX HW CI] Last {len(tail)} bytes of {self.size} bytes log, full log: "
+                    f"{Path(self.file.name).name} (python3 litex_hw_ci_log.py cat {self.path}).\n\n").encode())
+                view_file.write(tail)
+            else:
+                view_file.write(self.tail)
+        os.replace(tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+# Log Echo -----------------------------------------------------------------------------------------
+
+class LiteXCILogEcho:
+    """Console echo of logs, limited to rate bytes/s: Exceeding data is not echoed but summarized
+    once per second (full log is still available in the log file)."""
+    def __init__(self, rate=256 << 10):
+        self.rate       = rate
+        self.period     = time.monotonic()
+        self.budget     = rate
+        self.suppressed = 0
+
+    def summarize(self):
+        if self.suppressed:
+            self.output(f"\n[LiteX HW CI] ... {self.suppressed} bytes not echoed (see log) ...\n".encode())
+            self.suppressed = 0
+
+    def output(self, data):
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    def write(self, data):
+        if self.rate is None:
+            self.output(data)
+            return
+        now = time.monotonic()
+        if now - self.period >= 1.0:
+            self.summarize()
+            self.period = now
+            self.budget = self.rate
+        if len(data) <= self.budget:
+            self.budget -= len(data)
+            self.output(data)
+        else:
+            self.suppressed += len(data)
+
+    def close(self):
+        self.summarize()
+
+# Log Watchers -------------------------------------------------------------------------------------
+
+# Fatal log signatures (regexes on complete lines) per toolchain/build system, new sets can be added.
+log_signatures = {
+    "vivado" : [
+        r"^ERROR: \[[\w ]+ \d+-\d+\].*",
+    ],
+    "yosys_nextpnr" : [
+        r"^ERROR: .*",
+    ],
+    "efinity" : [
+        r"^\s*\[EFX-\d+ ERROR\].*",
+        r"^\s*ERROR\s*:.*",
+    ],
+    "gcc" : [
+        r"^[^\s:]+\.(?:c|cc|cpp|h|hpp|S|s):\d+(?::\d+)?: (?:fatal )?error: .*",
+        r"^collect2: error: .*",
+        r"^[^\s:]*ld(?:\.\w+)?: .*undefined reference to .*",
+    ],
+    "buildroot" : [
+        r"^make(?:\[\d+\])?: \*\*\* \[.*\] Error \d+",
+    ],
+}
+
+# Watched signature sets per step.
+default_watchers = {
+    "firmware_build" : ["gcc"],
+    "gateware_build" : ["vivado", "yosys_nextpnr", "efinity", "gcc"],
+    "software_build" : ["gcc", "buildroot"],
+}
+
+class LiteXCILogWatcher:
+    """Scans log stream (complete lines) for fatal signatures of the signature sets; match is
+    (signature set, matched line) of the first fatal line."""
+    def __init__(self, signature_sets, max_line=4096):
+        self.max_line = max_line
+        self.line     = b""
+        self.match    = None
+        self.names    = {}
+        regexes       = []
+        for name in signature_sets:
+            for regex in log_signatures[name]:
+                group = f"_s{len(regexes)}"
+                self.names[group] = name
+                regexes.append(f"(?P<{group}>{regex})")
+        self.regex = re.compile("|".join(regexes).encode(), re.MULTILINE) if regexes else None
+
+    def feed(self, data):
+        # Return True on first fatal match.
+        if self.regex is None or self.match is not None:
+            return False
+        data = self.line + data
+        end  = data.rfind(b"\n")
+        if end < 0:
+            self.line = data[-self.max_line:]
+            return False
+        self.line = data[end + 1:][-self.max_line:]
+        m = self.regex.search(data, 0, end)
+        if m is None:
+            return False
+        group      = next(group for group in self.names if m.group(group) is not None)
+        self.match = (self.names[group], m.group(group).decode(errors="replace").strip())
+        return True
+
+# Log Reader ---------------------------------------------------------------------------------------
+
+def get_log_file(path):
+    # Compressed log of path (if any) and its compression.
+    for compression, extension in log_compressions.items():
+        if os.path.exists(f"{path}{extension}"):
+            return f"{path}{extension}", compression
+    return None, "none"
+
+def iter_log(path, offset=0, size=None, chunk_size=1 << 20):
+    """Decompressed chunks of log path from offset (up to size bytes), one frame at a time."""
+    log_file, compression = get_log_file(path)
+    end = None if size is None else offset + size
+
+    # Uncompressed Log.
+    if log_file is None:
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while (end is None) or (f.tell() < end):
+                data = f.read(chunk_size if end is None else min(chunk_size, end - f.tell()))
+                if not data:
+                    break
+                yield data
+        return
+
+    # Compressed Log: Use index to only decompress needed frames.
+    try:
+        with open(f"{log_file}.idx") as index_file:
+            frames = json.load(index_file)["frames"]
+    except (OSError, ValueError):
+        frames = [[0, 0]] # No index (interrupted write): Decompress whole log.
+    with open(log_file, "rb") as f:
+        for n, (frame_offset, frame_position) in enumerate(frames):
+            next_offset, next_position = frames[n + 1] if n + 1 < len(frames) else (None, None)
+            if next_offset is not None and next_offset <= offset:
+                continue
+            if end is not None and frame_offset >= end:
+                break
+            f.seek(frame_position)
+            data  = f.read() if next_position is None else f.read(next_position - frame_position)
+            data  = decompress(compression, data)
+            start = max(offset - frame_offset, 0)
+            stop  = None if end is None else end - frame_offset
+            yield data[start:stop]
+
+def read_log(path, offset=0, size=None):
+    return b"".join(iter_log(path, offset, size))
+
+# Log Server ---------------------------------------------------------------------------------------
+
+class LiteXCILogRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Serve directory, with .rpt logs decompressed on the fly from their compressed log.
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        log_file, compression = get_log_file(path)
+        if not path.endswith(".rpt") or log_file is None:
+            return super().do_GET()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.end_headers()
+        for data in iter_log(path):
+            self.wfile.write(data)
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX HW CI Logs.")
+    parser.add_argument("command",     choices=["cat", "serve"],    help="Print decompressed log or serve directory with decompressed logs.")
+    parser.add_argument("path",        nargs="?", default=".",      help="Log (.rpt) for cat, directory for serve.")
+    parser.add_argument("--offset",    default=0,    type=int,      help="cat: Start offset (in bytes).")
+    parser.add_argument("--size",      default=None, type=int,      help="cat: Size (in bytes).")
+    parser.add_argument("--port",      default=8000, type=int,      help="serve: HTTP port.")
+    args = parser.parse_args()
+
+    if args.command == "cat":
+        for data in iter_log(args.path, args.offset, args.size):
+            sys.stdout.buffer.write(data)
+        return 0
+
+    handler = functools.partial(LiteXCILogRequestHandler, directory=args.path)
+    with http.server.ThreadingHTTPServer(("", args.port), handler) as server:
+        print(f"Serving {args.path} on port {args.port}.")
+        server.serve_forever()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
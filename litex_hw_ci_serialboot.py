@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# LiteX HW CI Serial Boot.
+#
+# Native LiteX BIOS serialboot (SFL protocol) for test_boot_json configs, run from the console's
+# event loop: On the BIOS magic request, the images of the boot JSON are uploaded with LOAD frames
+# pipelined ahead of the acks (up to window outstanding frames, the BIOS acknowledging frames in
+# order), then the BIOS jumps to the boot address (address of the last image). Images are
+# memory-mapped and the frames CRCs precomputed before the upload, frames being written with writev
+# directly from the mapping. Frames with CRC errors are resent; per-image throughput stats are
+# collected for the report.
+
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+import asyncio
+import binascii
+import argparse
+import collections
+
+from pathlib import Path
+
+# Constants ----------------------------------------------------------------------------------------
+
+sfl_magic_req      = b"sL5DdSMmkekro\n"
+sfl_magic_ack      = b"z6IHG7cYDID6o\n"
+sfl_payload_length = 255 # Max payload (Address + Data).
+
+sfl_cmd_abort = 0x00
+sfl_cmd_load  = 0x01
+sfl_cmd_jump  = 0x02
+
+sfl_ack_success  = ord("K")
+sfl_ack_crcerror = ord("C")
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def sfl_frame(cmd, payload):
+    # Frame: Length, CRC16 (XMODEM, over cmd + payload), cmd, payload.
+    crc = binascii.crc_hqx(payload, binascii.crc_hqx(bytes([cmd]), 0))
+    return struct.pack(">BHB", len(payload), crc, cmd) + payload
+
+def get_boot_images(boot_json):
+    """Images (path, address) of a LiteX boot JSON and boot address (address of the last image)."""
+    boot_json = Path(boot_json)
+    with open(boot_json) as f:
+        regions = json.load(f)
+    images = [(boot_json.parent / name, int(address, 0)) for name, address in regions.items() if name != "bootargs"]
+    return images, images[-1][1]
+
+# Serial Boot Image --------------------------------------------------------------------------------
+
+class LiteXCISerialBootImage:
+    """Memory-mapped image split in LOAD frames, with frames CRCs precomputed."""
+    def __init__(self, path, address, payload_length=sfl_payload_length):
+        self.path    = Path(path)
+        self.address = address
+        self.chunk   = payload_length - 4
+        with open(self.path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            self.data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b"")
+        self.crcs = array.array("H")
+        for offset in range(0, self.size, self.chunk):
+            header = bytes([sfl_cmd_load]) + struct.pack(">I", address + offset)
+            self.crcs.append(binascii.crc_hqx(self.data[offset:offset + self.chunk], binascii.crc_hqx(header, 0)))
+
+    def __len__(self):
+        return len(self.crcs)
+
+    def get_frame(self, n):
+        # Frame n as (header, data) for writev (data is a slice of the mapping).
+        offset = n*self.chunk
+        data   = self.data[offset:offset + self.chunk]
+        return [struct.pack(">BHBI", len(data) + 4, self.crcs[n], sfl_cmd_load, self.address + offset), data]
+
+# Serial Boot --------------------------------------------------------------------------------------
+
+class LiteXCISerialBoot:
+    """Native serialboot on a (non-blocking) file descriptor, fed by the console with the received
+    data; stats has the per-image upload stats and timings (when set) receives report entries."""
+    def __init__(self, fd, boot_json, window=128, timeout=5.0, retries=8, batch=64, payload_length=sfl_payload_length):
+        images, self.boot_address = get_boot_images(boot_json)
+        self.images      = [LiteXCISerialBootImage(path, address, payload_length) for path, address in images]
+        self.fd          = fd
+        self.window      = window
+        self.timeout     = timeout
+        self.retries     = retries
+        self.batch       = batch
+        self.tail        = b""
+        self.active      = False
+        self.done        = False
+        self.error       = None
+        self.outstanding = collections.deque()
+        self.resend      = collections.deque()
+        self.errors      = collections.Counter()
+        self.event       = asyncio.Event()
+        self.stats       = []
+        self.timings     = None
+        self.start_time  = 0.0
+        self.log_file    = None
+
+    def receive(self, data):
+        """Feed received data, returns data for the console (replies consumed while uploading)."""
+        if self.active:
+            n = min(len(data), len(self.outstanding))
+            for reply in data[:n]:
+                frame = self.outstanding.popleft()
+                if reply == sfl_ack_crcerror:
+                    self.resend.append(frame)
+                elif reply != sfl_ack_success:
+                    self.error = f"unexpected reply {bytes([reply])!r}"
+            if n:
+                self.event.set()
+            return data[n:]
+        # Detect BIOS magic request (possibly split between chunks).
+        if not self.done:
+            if sfl_magic_req in self.tail + data:
+                self.active = True
+                self.task   = asyncio.get_running_loop().create_task(self.upload())
+            self.tail = (self.tail + data)[-len(sfl_magic_req):]
+        return data
+
+    async def write(self, parts):
+        loop = asyncio.get_running_loop()
+        while parts:
+            try:
+                n = os.writev(self.fd, parts)
+            except BlockingIOError:
+                n = 0
+            while parts and n >= len(parts[0]):
+                n -= len(parts[0])
+                parts.pop(0)
+            if parts:
+                parts[0] = parts[0][n:]
+                # Wait for fd to be writable.
+                writable = loop.create_future()
+                loop.add_writer(self.fd, lambda: writable.done() or writable.set_result(None))
+                try:
+                    await writable
+                finally:
+                    loop.remove_writer(self.fd)
+
+    def get_frame(self, frame):
+        if frame == "jump":
+            return [sfl_frame(sfl_cmd_jump, struct.pack(">I", self.boot_address))]
+        image, n = frame
+        return image.get_frame(n)
+
+    async def send(self, frames):
+        parts = []
+        for frame in frames:
+            self.outstanding.append(frame)
+            parts += self.get_frame(frame)
+        await self.write(parts)
+
+    async def wait(self, outstanding):
+        # Wait until at most outstanding frames are unacknowledged, resending frames with CRC errors.
+        while True:
+            while self.resend:
+                frame = self.resend.popleft()
+                self.errors[frame] += 1
+                if self.errors[frame] > self.retries:
+                    raise RuntimeError("too many CRC errors")
+                await self.send([frame])
+            if self.error is not None:
+                raise RuntimeError(self.error)
+            if len(self.outstanding) <= outstanding:
+                return
+            self.event.clear()
+            try:
+                await asyncio.wait_for(self.event.wait(), self.timeout)
+            except asyncio.TimeoutError:
+                raise RuntimeError("no reply from the BIOS")
+
+    def add_stats(self, image, start, end, status="OK"):
+        stats = {
+            "name"       : image.path.name,
+            "size"       : image.size,
+            "duration"   : end - start,
+            "throughput" : image.size/max(end - start, 1e-6),
+            "crc_errors" : sum(count for frame, count in self.errors.items() if frame != "jump" and frame[0] is image),
+        }
+        self.stats.append(stats)
+        message = f"Serialboot {stats['name']}: {stats['size']} bytes in {stats['duration']:.2f}s " \
+                  f"({stats['throughput']/1e3:.1f}KB/s, CRC errors: {stats['crc_errors']})"
+        if self.log_file is not None:
+            self.log_file.write(f"\n[LiteX HW CI] {message}.\n")
+        if self.timings is not None:
+            self.timings.append({
+                "name"    : f"{message}",
+                "start"   : round(start - self.start_time, 3),
+                "elapsed" : round(end - start, 3),
+                "status"  : status,
+            })
+
+    async def upload(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await self.write([sfl_magic_ack])
+            for image in self.images:
+                start = loop.time()
+                try:
+                    # LOAD frames, pipelined up to window outstanding frames (sent by batches).
+                    n = 0
+                    while n < len(image):
+                        await self.wait(self.window - 1)
+                        count = min(self.window - len(self.outstanding), self.batch, len(image) - n)
+                        await self.send([(image, i) for i in range(n, n + count)])
+                        n += count
+                    await self.wait(0)
+                except RuntimeError:
+                    self.add_stats(image, start, loop.time(), status="ERROR")
+                    raise
+                self.add_stats(image, start, loop.time())
+            # JUMP frame.
+            await self.send(["jump"])
+            await self.wait(0)
+        except (OSError, RuntimeError) as e:
+            self.error = str(e)
+            if self.log_file is not None:
+                self.log_file.write(f"\n[LiteX HW CI] Serialboot failed: {self.error}.\n")
+        finally:
+            self.active = False
+            self.done   = True
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    from litex_hw_ci import LiteXCIConsole, LiteXCIMatcher, open_serial
+
+    parser = argparse.ArgumentParser(description="LiteX HW CI Serial Boot.")
+    parser.add_argument("tty",                                   help="Board TTY.")
+    parser.add_argument("boot_json",                             help="Boot JSON (images/addresses).")
+    parser.add_argument("--baudrate", default=115200, type=int,  help="TTY baudrate.")
+    parser.add_argument("--window",   default=128,    type=int,  help="Max outstanding frames (1: No pipelining).")
+    parser.add_argument("--timeout",  default=30.0,   type=float, help="Time to wait for the serialboot request (in seconds).")
+    args = parser.parse_args()
+
+    async def run():
+        fd         = open_serial(args.tty, args.baudrate)
+        serialboot = LiteXCISerialBoot(fd, args.boot_json, window=args.window)
+        console    = LiteXCIConsole(fd, serialboot=serialboot)
+        console.open()
+        try:
+            # Request serialboot and wait for the upload to complete.
+            console.write("\nserialboot\n")
+            loop     = asyncio.get_running_loop()
+            deadline = loop.time() + args.timeout
+            while not serialboot.done and (loop.time() < deadline or serialboot.active):
+                await asyncio.sleep(0.1)
+        finally:
+            console.close()
+            os.close(fd)
+        for stats in serialboot.stats:
+            print(f"\n{stats['name']}: {stats['size']} bytes in {stats['duration']:.2f}s ({stats['throughput']/1e3:.1f}KB/s, CRC errors: {stats['crc_errors']}).")
+        return 0 if (serialboot.done and serialboot.error is None) else 1
+
+    return asyncio.run(run())
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# LiteX HW CI Artifact Store.
+#
+# Content-addressed store of the build_<name>/ outputs: Once a config ran, its files are hashed
+# (SHA-256) and stored once in objects/, the build_<name>/ files being replaced by reflinks to the
+# objects, so identical files (Linux images, BIOS/libraries objects, ...) only use disk space once
+# across configs and runs. Each run records the objects referenced by its configs in a manifest;
+# the garbage collector keeps the objects referenced by the last runs and removes the others by age
+# and size (oldest first).
+#
+# Objects are private read-only clones/copies of the files and build_<name>/ files are only replaced
+# by reflinks (copy-on-write): Build outputs stay writable and are never shared with the store. On
+# filesystems without reflink support, files would only be copied (no deduplication): litex_hw_ci.py
+# then disables the store.
+
+import os
+import re
+import sys
+import time
+import json
+import stat
+import fcntl
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+
+from pathlib import Path
+
+# Constants ----------------------------------------------------------------------------------------
+
+FICLONE = 0x40049409 # Linux ioctl cloning a file (reflink, Btrfs/XFS/...).
+
+# Files not stored: Steps logs, timings and compiler cache stats (rewritten by each step, including
+# hardware steps).
+artifact_store_exclude = re.compile(r"\.rpt(\.\w+)*$|_timings\.json$|_ccache\.log$")
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def get_file_hash(path, chunk=1024*1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while data := f.read(chunk):
+            h.update(data)
+    return h.hexdigest()
+
+def reflink(src, dst):
+    # Clone src to dst (extents shared, copy-on-write), raises OSError when not supported.
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+    shutil.copystat(src, dst)
+
+def get_run_name():
+    return time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+
+# Artifact Store -----------------------------------------------------------------------------------
+
+class LiteXCIArtifactStore:
+    """Content-addressed store deduplicating build_<name>/ files.
+
+    link is "reflink", "copy" or "auto" (reflink when supported by the store's filesystem).
+    Files smaller than min_size are left in place (no gain over their directory entry). GC keeps
+    the objects referenced by the last keep_runs runs, other objects being removed when older than
+    max_age (in days) or while the store exceeds max_size (in bytes).
+    """
+    def __init__(self, path, link="auto", min_size=4096, keep_runs=5, max_size=50e9, max_age=30):
+        self.path      = Path(path)
+        self.min_size  = min_size
+        self.keep_runs = keep_runs
+        self.max_size  = max_size
+        self.max_age   = max_age
+        self.lock      = threading.Lock()
+        self.run       = get_run_name()
+        (self.path / "objects").mkdir(parents=True, exist_ok=True)
+        (self.path / "runs").mkdir(parents=True, exist_ok=True)
+        self.link      = self.get_link() if link == "auto" else link
+
+    def get_link(self):
+        # Reflink when supported by the store's filesystem, copy otherwise.
+        with tempfile.TemporaryDirectory(dir=self.path) as tmp:
+            (Path(tmp) / "src").write_bytes(b"\0")
+            try:
+                reflink(Path(tmp) / "src", Path(tmp) / "dst")
+                return "reflink"
+            except OSError:
+                return "copy"
+
+    def get_object(self, digest):
+        return self.path / "objects" / digest[:2] / digest[2:]
+
+    # Manifests ------------------------------------------------------------------------------------
+
+    def get_runs(self):
+        return sorted(p for p in (self.path / "runs").iterdir() if p.is_dir())
+
+    def write_manifest(self, name, manifest):
+        run = self.path / "runs" / self.run
+        run.mkdir(exist_ok=True)
+        tmp = run / f"{name}.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, run / f"{name}.json")
+
+    # Ingest ---------------------------------------------------------------------------------------
+
+    def place(self, path, digest):
+        """Store file in the store (when new) and replace it by a reflink to the object (when
+        supported), return True when the file was deduplicated."""
+        obj = self.get_object(digest)
+        with self.lock:
+            if not obj.exists():
+                # New object: Private clone/copy of the file, read-only before being visible.
+                obj.parent.mkdir(exist_ok=True)
+                obj_tmp = obj.with_name(f"{obj.name}.tmp")
+                if self.link == "reflink":
+                    reflink(path, obj_tmp)
+                else:
+                    shutil.copy2(path, obj_tmp)
+                os.chmod(obj_tmp, os.stat(obj_tmp).st_mode & 0o555)
+                os.replace(obj_tmp, obj)
+                return False
+            if self.link != "reflink":
+                return False
+            # Replace file by a reflink to the object (through a temporary file, atomic).
+            tmp = path.with_name(f".{path.name}.store")
+            reflink(obj, tmp)
+            shutil.copystat(path, tmp)
+            os.replace(tmp, path)
+            return True
+
+    def ingest(self, name, output_dir):
+        """Deduplicate config's build_<name>/ files through the store and record them in the run's
+        manifest."""
+        manifest = {}
+        stats    = {"files": 0, "size": 0, "deduplicated": 0}
+        for root, dirs, files in os.walk(output_dir):
+            for filename in files:
+                path = Path(root) / filename
+                st   = os.lstat(path)
+                if not stat.S_ISREG(st.st_mode) or st.st_size < self.min_size:
+                    continue
+                if artifact_store_exclude.search(filename):
+                    continue
+                relpath = str(path.relative_to(output_dir))
+                try:
+                    digest = get_file_hash(path)
+                    if self.place(path, digest):
+                        stats["deduplicated"] += st.st_size
+                except OSError as e:
+                    # File removed while walking, ...: Left in place.
+                    print(f"[LiteX HW CI] Artifact store: {relpath} not stored ({e}).")
+                    continue
+                manifest[relpath] = digest
+                stats["files"]   += 1
+                stats["size"]    += st.st_size
+        self.write_manifest(name, manifest)
+        print(f"[LiteX HW CI] Artifact store {name}: {stats['files']} files, {stats['size']/1e6:.1f}MB "
+              f"({stats['deduplicated']/1e6:.1f}MB deduplicated, {self.link}).")
+        return stats
+
+    # Garbage Collector ----------------------------------------------------------------------------
+
+    def gc(self):
+        """Remove old runs manifests (keeping keep_runs) and objects not referenced by the kept
+        runs, when older than max_age or while the store exceeds max_size (oldest first)."""
+        with self.lock:
+            runs = self.get_runs()
+            for run in runs[:-self.keep_runs] if self.keep_runs else runs:
+                shutil.rmtree(run, ignore_errors=True)
+            referenced = set()
+            for run in self.get_runs():
+                for manifest in run.glob("*.json"):
+                    try:
+                        with open(manifest) as f:
+                            referenced.update(json.load(f).values())
+                    except (OSError, ValueError):
+                        continue
+
+            # Objects (digest, path, stat), oldest first.
+            objects = []
+            for obj in (self.path / "objects").glob("*/*"):
+                if obj.name.endswith(".tmp"):
+                    continue
+                objects.append((obj.parent.name + obj.name, obj, obj.stat()))
+            objects.sort(key=lambda o: o[2].st_mtime)
+            size    = sum(st.st_size for _, _, st in objects)
+            limit   = time.time() - self.max_age*24*3600
+            removed = {"objects": 0, "size": 0}
+            for digest, obj, st in objects:
+                if digest in referenced:
+                    continue
+                if (st.st_mtime >= limit) and (size <= self.max_size):
+                    continue
+                obj.unlink()
+                size -= st.st_size
+                removed["objects"] += 1
+                removed["size"]    += st.st_size
+            print(f"[LiteX HW CI] Artifact store GC: {removed['objects']} objects removed "
+                  f"({removed['size']/1e6:.1f}MB), {size/1e6:.1f}MB in store.")
+            return removed
+
+    def get_stats(self):
+        # Store size and size of the referenced build_<name>/ files (without deduplication).
+        objects = [obj.stat().st_size for obj in (self.path / "objects").glob("*/*")]
+        sizes   = {}
+        for run in self.get_runs():
+            for manifest in run.glob("*.json"):
+                with open(manifest) as f:
+                    for digest in json.load(f).values():
+                        obj = self.get_object(digest)
+                        if obj.exists():
+                            sizes[(run.name, manifest.stem, digest)] = obj.stat().st_size
+        return {
+            "runs"       : len(self.get_runs()),
+            "objects"    : len(objects),
+            "size"       : sum(objects),
+            "referenced" : sum(sizes.values()),
+        }
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX HW CI Artifact Store.")
+    parser.add_argument("command",     choices=["stats", "gc"],       help="Show store statistics or run the garbage collector.")
+    parser.add_argument("--store",     default="litex_hw_ci_store",   help="Artifact store directory.")
+    parser.add_argument("--keep-runs", default=5,  type=int,          help="Keep objects referenced by the last N runs.")
+    parser.add_argument("--max-size",  default=50, type=float,        help="Store maximum size (in GB, unreferenced objects).")
+    parser.add_argument("--max-age",   default=30, type=float,        help="Unreferenced objects maximum age (in days).")
+    args = parser.parse_args()
+
+    store = LiteXCIArtifactStore(args.store, keep_runs=args.keep_runs, max_size=args.max_size*1e9, max_age=args.max_age)
+    if args.command == "gc":
+        store.gc()
+        return 0
+    stats = store.get_stats()
+    print(f"Runs: {stats['runs']}, Objects: {stats['objects']}, Store: {stats['size']/1e6:.1f}MB, "
+          f"Referenced: {stats['referenced']/1e6:.1f}MB ({store.link}).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
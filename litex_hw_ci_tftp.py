@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# LiteX HW CI TFTP Server.
+#
+# Read-only TFTP server (RFC 1350) with blksize/tsize/timeout (RFC 2348/2349) and windowsize
+# (RFC 7440) options. Each client IP is mapped to its own root directory (the build_<name>/images/
+# directory of the config being tested on the board), so boards can netboot different images at the
+# same time without staging them in a shared /tftpboot. Files are mmapped and data blocks are sent
+# directly from the mapping (no copy), each transfer running in its own thread/socket.
+
+import os
+import sys
+import mmap
+import time
+import struct
+import socket
+import argparse
+import threading
+import contextlib
+
+from pathlib import Path
+
+# Constants ----------------------------------------------------------------------------------------
+
+TFTP_RRQ   = 1
+TFTP_WRQ   = 2
+TFTP_DATA  = 3
+TFTP_ACK   = 4
+TFTP_ERROR = 5
+TFTP_OACK  = 6
+
+TFTP_ERROR_NOT_FOUND   = 1
+TFTP_ERROR_ACCESS      = 2
+TFTP_ERROR_ILLEGAL     = 4
+TFTP_ERROR_UNKNOWN_TID = 5
+TFTP_ERROR_OPTIONS     = 8
+
+tftp_default_blksize = 512
+
+# Helpers ------------------------------------------------------------------------------------------
+
+def parse_request(packet):
+    # Filename, mode and options (lowercase names) of a RRQ/WRQ packet.
+    fields = packet[2:].split(b"\0")
+    if len(fields) < 3:
+        raise ValueError("Malformed request")
+    filename, mode = fields[0].decode(errors="replace"), fields[1].decode(errors="replace").lower()
+    options = {}
+    for name, value in zip(fields[2:-1:2], fields[3:-1:2]):
+        options[name.decode(errors="replace").lower()] = value.decode(errors="replace")
+    return filename, mode, options
+
+def error_packet(code, message):
+    return struct.pack("!HH", TFTP_ERROR, code) + message.encode() + b"\0"
+
+# TFTP Server --------------------------------------------------------------------------------------
+
+class LiteXCITFTPServer:
+    """Multi-client read-only TFTP server with per-client roots.
+
+    Roots are registered per client IP (serve() while a config is on its board), requests from
+    unregistered clients are served from default_root (when set) or rejected. Transfers statistics
+    (size, duration, options) are kept in transfers.
+    """
+    def __init__(self, host="0.0.0.0", port=69, default_root=None, max_blksize=65464, max_windowsize=64, timeout=1.0, retries=5):
+        self.host           = host
+        self.port           = port
+        self.default_root   = default_root
+        self.max_blksize    = max_blksize
+        self.max_windowsize = max_windowsize
+        self.timeout        = timeout
+        self.retries        = retries
+        self.lock           = threading.Lock()
+        self.roots          = {}
+        self.transfers      = []
+        self.stopped        = threading.Event()
+
+    # Roots ----------------------------------------------------------------------------------------
+
+    def get_root(self, ip):
+        with self.lock:
+            root = self.roots.get(ip, self.default_root)
+        return None if root is None else Path(root).resolve()
+
+    @contextlib.contextmanager
+    def serve(self, ip, root):
+        # Serve root to client ip while in context.
+        with self.lock:
+            self.roots[ip] = root
+        try:
+            yield
+        finally:
+            with self.lock:
+                if self.roots.get(ip) == root:
+                    del self.roots[ip]
+
+    # Server ---------------------------------------------------------------------------------------
+
+    def start(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self.socket.bind((self.host, self.port))
+        except OSError:
+            self.socket.close()
+            raise
+        self.socket.settimeout(0.5)
+        self.port   = self.socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.socket.close()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                packet, client = self.socket.recvfrom(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if len(packet) < 2:
+                continue
+            threading.Thread(target=self.handle, args=(packet, client), daemon=True).start()
+
+    # Transfers ------------------------------------------------------------------------------------
+
+    def handle(self, packet, client):
+        # Each transfer uses its own socket/port (TID).
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind((self.host, 0))
+            opcode = struct.unpack("!H", packet[:2])[0]
+            if opcode == TFTP_WRQ:
+                sock.sendto(error_packet(TFTP_ERROR_ACCESS, "Read-only server"), client)
+                return
+            if opcode != TFTP_RRQ:
+                sock.sendto(error_packet(TFTP_ERROR_ILLEGAL, "Illegal operation"), client)
+                return
+            try:
+                filename, mode, options = parse_request(packet)
+            except ValueError:
+                sock.sendto(error_packet(TFTP_ERROR_ILLEGAL, "Malformed request"), client)
+                return
+
+            # Resolve file in client's root (no access outside of it).
+            root = self.get_root(client[0])
+            if root is None:
+                sock.sendto(error_packet(TFTP_ERROR_ACCESS, f"No root for {client[0]}"), client)
+                return
+            path = (root / filename.lstrip("/")).resolve()
+            if (root not in path.parents) or not path.is_file():
+                sock.sendto(error_packet(TFTP_ERROR_NOT_FOUND, f"{filename} not found"), client)
+                return
+
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+                try:
+                    self.send_file(sock, client, filename, memoryview(data), size, options)
+                finally:
+                    if size:
+                        data.close()
+
+    def negotiate(self, options, size):
+        # Accepted options (clamped to server limits), RFC 2347.
+        accepted = {}
+        try:
+            if "blksize" in options:
+                accepted["blksize"] = min(max(int(options["blksize"]), 8), self.max_blksize)
+            if "windowsize" in options:
+                accepted["windowsize"] = min(max(int(options["windowsize"]), 1), self.max_windowsize)
+            if "timeout" in options:
+                accepted["timeout"] = min(max(int(options["timeout"]), 1), 255)
+            if "tsize" in options:
+                accepted["tsize"] = size
+        except ValueError:
+            return None
+        return accepted
+
+    def send_file(self, sock, client, filename, data, size, options):
+        accepted = self.negotiate(options, size)
+        if accepted is None:
+            sock.sendto(error_packet(TFTP_ERROR_OPTIONS, "Invalid options"), client)
+            return
+        blksize    = accepted.get("blksize",    tftp_default_blksize)
+        windowsize = accepted.get("windowsize", 1)
+        timeout    = accepted.get("timeout",    self.timeout)
+        start_time = time.monotonic()
+
+        # Option Acknowledgment (acknowledged by ACK of block 0).
+        if accepted:
+            oack = b"".join(f"{name}\0{value}\0".encode() for name, value in accepted.items())
+            if self.send_window(sock, client, [struct.pack("!H", TFTP_OACK) + oack], 0, 0, timeout) is None:
+                return
+
+        # Data blocks (last one shorter than blksize, possibly empty), sent by windows.
+        blocks = size//blksize + 1
+        acked  = 0
+        while acked < blocks:
+            last = min(acked + windowsize, blocks)
+            # Block numbers wrap around at 65536 (large files).
+            packets = [[struct.pack("!HH", TFTP_DATA, n & 0xffff), data[(n - 1)*blksize:n*blksize]] for n in range(acked + 1, last + 1)]
+            acked = self.send_window(sock, client, packets, acked, last, timeout)
+            if acked is None:
+                return
+
+        duration = time.monotonic() - start_time
+        transfer = {
+            "client"     : client[0],
+            "filename"   : filename,
+            "size"       : size,
+            "duration"   : duration,
+            "blksize"    : blksize,
+            "windowsize" : windowsize,
+        }
+        with self.lock:
+            self.transfers.append(transfer)
+        print(f"[LiteX HW CI] TFTP {client[0]}: {filename} ({size} bytes) in {duration:.2f}s "
+              f"({size/max(duration, 1e-6)/1e6:.2f}MB/s, blksize: {blksize}, windowsize: {windowsize}).")
+
+    def send_window(self, sock, client, packets, acked, last, timeout):
+        """Send packets (blocks acked+1 to last, or OACK as block 0) until acknowledged; return the
+        acknowledged block (a partial ACK slides the window to the block following it)."""
+        for retry in range(self.retries + 1):
+            for packet in packets:
+                sock.sendmsg(packet if isinstance(packet, list) else [packet], [], 0, client)
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sock.settimeout(remaining)
+                try:
+                    packet, address = sock.recvfrom(65536)
+                except socket.timeout:
+                    break
+                if address != client:
+                    sock.sendto(error_packet(TFTP_ERROR_UNKNOWN_TID, "Unknown transfer ID"), address)
+                    continue
+                if len(packet) < 4:
+                    continue
+                opcode, block = struct.unpack("!HH", packet[:4])
+                if opcode == TFTP_ERROR:
+                    return None
+                if opcode != TFTP_ACK:
+                    continue
+                if last == 0 and block == 0:
+                    return 0
+                # Map (wrapped) block number to the window's blocks, ignore duplicate/old ACKs.
+                for n in range(last, acked, -1):
+                    if n & 0xffff == block:
+                        return n
+        return None
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX HW CI TFTP Server.")
+    parser.add_argument("--host",           default="0.0.0.0",        help="Bind address.")
+    parser.add_argument("--port",           default=69,   type=int,   help="UDP port.")
+    parser.add_argument("--root",           default=None,             help="Root directory for clients without specific root.")
+    parser.add_argument("--map",            default=[],   action="append", help="Client specific root (IP=DIR, can be repeated).")
+    parser.add_argument("--max-windowsize", default=64,   type=int,   help="Maximum windowsize accepted.")
+    args = parser.parse_args()
+
+    server = LiteXCITFTPServer(args.host, args.port, default_root=args.root, max_windowsize=args.max_windowsize)
+    for mapping in args.map:
+        ip, root = mapping.split("=", 1)
+        server.roots[ip] = root
+    server.start()
+    print(f"Serving TFTP on {args.host}:{server.port}.")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# LiteX HW CI Failure Triage.
+#
+# Error/warning lines of the steps logs are normalized (timestamps, paths, addresses, line numbers
+# removed) and fingerprinted after each step. Fingerprints are stored in the history database with
+# an inverted index of their tokens, so failures are grouped with earlier occurrences of the same
+# signature and queried without re-scanning the logs.
+
+import re
+import sys
+import hashlib
+import argparse
+
+from litex_hw_ci_log import iter_log
+
+# Constants ----------------------------------------------------------------------------------------
+
+error_regex   = re.compile(r"\b(?:error|fatal|panic|failed|failure)\b", re.IGNORECASE)
+warning_regex = re.compile(r"\b(?:critical warning|warning)\b", re.IGNORECASE)
+
+# Normalizations (applied in order).
+normalizations = [
+    (re.compile(r"\x1b\[[0-9;]*[A-Za-z]"),                                   ""),       # ANSI escapes.
+    (re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?"),      "<TS>"),   # Date/Time.
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:\.\d+)?\b"),                       "<TS>"),   # Time.
+    (re.compile(r"^\[\s*\d+\.\d+\]"),                                        "<TS>"),   # Kernel timestamp.
+    (re.compile(r"(?:(?<![\w.])\.{0,2}/|\bbuild_[\w-]+/)(?:[\w.+-]+/)*([\w.+-]+)"), r"<PATH>/\1"), # Paths (basename kept).
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"),                                      "<HEX>"),  # Hex values/addresses.
+    (re.compile(r":\d+(?::\d+)?(?=[:\s)\]]|$)"),                               ":<N>"),   # Line/Column numbers.
+    (re.compile(r"\b\d+\.\d+\b|\b\d{5,}\b"),                                 "<N>"),    # Decimals/large numbers.
+    (re.compile(r"\s+"),                                                     " "),      # Whitespaces.
+]
+
+token_regex = re.compile(r"[a-z_][\w-]{2,}")
+
+# Signatures ---------------------------------------------------------------------------------------
+
+def normalize_line(line):
+    for regex, replacement in normalizations:
+        line = regex.sub(replacement, line)
+    return line.strip()
+
+def get_fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+def get_tokens(normalized):
+    return sorted(set(token_regex.findall(normalized.lower())) - {"path", "hex"})
+
+def get_line_level(line):
+    if error_regex.search(line):
+        return "error"
+    if warning_regex.search(line):
+        return "warning"
+    return None
+
+def get_log_signatures(log_path, max_signatures=1000, max_line=512):
+    """Error/Warning signatures of a log (streamed), as {fingerprint: signature} in order of first
+    occurrence; signature has level, normalized line, first line (sample) and count."""
+    signatures = {}
+    pending    = b""
+    for data in iter_log(log_path):
+        lines   = (pending + data).split(b"\n")
+        pending = lines.pop()[-max_line:]
+        for line in lines:
+            line  = line[:max_line].decode(errors="replace").strip()
+            level = get_line_level(line)
+            if level is None:
+                continue
+            normalized  = normalize_line(line)
+            fingerprint = get_fingerprint(normalized)
+            if fingerprint in signatures:
+                signatures[fingerprint]["count"] += 1
+            elif len(signatures) < max_signatures:
+                signatures[fingerprint] = {
+                    "level"      : level,
+                    "normalized" : normalized,
+                    "sample"     : line,
+                    "count"      : 1,
+                }
+    return signatures
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    from litex_hw_ci import LiteXCIHistory
+
+    parser = argparse.ArgumentParser(description="LiteX HW CI Failure Triage.")
+    parser.add_argument("command",   choices=["list", "query"],                help="List failure signatures or query a signature (fingerprint or words).")
+    parser.add_argument("query",     nargs="*",                                help="query: Fingerprint or words of the signature.")
+    parser.add_argument("--history", default="litex_hw_ci_history.db",         help="History database.")
+    parser.add_argument("--runs",    default=30, type=int,                     help="Number of last runs to consider.")
+    parser.add_argument("--level",   default="error", choices=["error", "warning"], help="Signatures level.")
+    args = parser.parse_intermixed_args()
+
+    history = LiteXCIHistory(args.history)
+
+    # List failure signatures of last runs (most frequent first).
+    if args.command == "list":
+        for fingerprint, normalized, configs, runs in history.get_signatures(args.runs, args.level):
+            print(f"{fingerprint} configs: {configs:3d} runs: {runs:3d} {normalized}")
+        return 0
+
+    # Query a signature: Configs/steps where it occurred in last runs.
+    for fingerprint, normalized in history.find_signatures(" ".join(args.query)):
+        print(f"{fingerprint} {normalized}")
+        for run_id, start_time, config, step, count in history.get_signature_occurrences(fingerprint, args.runs):
+            print(f"    run {run_id:4d} ({start_time}) {config:<40s} {step:<16s} x{count}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+
+#
+# This file is part of LiteX-HW-CI.
+#
+# Copyright (c) 2024 Enjoy-Digital <enjoy-digital.fr>
+# SPDX-License-Identifier: BSD-2-Clause
+
+# LiteX HW CI Warm Elaboration Worker.
+#
+# Long-lived process keeping LiteX/Migen imported and the SoC of each (target, gateware_command)
+# elaborated once (BaseSoC construction only). Firmware build, gateware build and load requests are
+# then served from this elaboration: each request is executed in a forked child (running the rest of
+# the target's main, ex: post-construction add_xy, on its own copy of the SoC so the elaborated SoC
+# stays pristine in the worker) with its output streamed back to the client over a local Unix socket. The child runs in
+# its own process group, reported to the client: An interrupted client (ex: fail-fast) cancels its
+# request, the worker then terminating the child and its processes (ex: toolchain). Elaborations are
+# released after load, and at most max_elaborations are retained (least recently used released).
+
+import os
+import re
+import sys
+import json
+import shlex
+import signal
+import time
+import socket
+import codecs
+import collections
+import argparse
+import importlib
+
+# Constants ----------------------------------------------------------------------------------------
+
+# Markers (on their own line) of the request's status and child's pid.
+marker        = "@litex_hw_ci_worker-"
+marker_regex  = re.compile(rb"^@litex_hw_ci_worker-(\w+):(-?\d+)\n", re.MULTILINE)
+status_marker = f"\n{marker}status:"
+pid_marker    = f"\n{marker}pid:"
+
+def get_action_args(action, output_dir):
+    return {
+        "firmware_build" : [f"--output-dir={output_dir}", f"--soc-json={output_dir}/soc.json", "--build", "--no-compile-gateware"],
+        "gateware_build" : [f"--output-dir={output_dir}", "--build"],
+        "load"           : [f"--output-dir={output_dir}", "--load"],
+    }[action]
+
+# Worker Server ------------------------------------------------------------------------------------
+
+class LiteXCISoCCaptured(Exception):
+    """Raised once BaseSoC is constructed to stop the target's main during elaboration."""
+
+class LiteXCIWorker:
+    def __init__(self, socket_path, max_elaborations=4):
+        self.socket_path      = socket_path
+        self.max_elaborations = max_elaborations
+        self.socs             = collections.OrderedDict()
+        self.children         = set()
+
+    def run_target_main(self, module, target, args):
+        sys.argv = [target] + args
+        try:
+            module.main()
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code)
+                return 1
+            return e.code or 0
+        return 0
+
+    def elaborate(self, target, gateware_args):
+        key = (target, tuple(gateware_args))
+        if key in self.socs:
+            self.socs.move_to_end(key)
+        else:
+            module  = importlib.import_module(f"litex_boards.targets.{target}")
+            soc_cls = getattr(module, "BaseSoC", None)
+            socs    = []
+            # Targets without BaseSoC: No warm elaboration, requests will elaborate in child.
+            if soc_cls is not None:
+                # Run target's main up to BaseSoC construction and capture the elaborated SoC (code
+                # modifying the SoC after construction only runs in the request's child, once).
+                def capture_soc(*args, **kwargs):
+                    socs.append(soc_cls(*args, **kwargs))
+                    raise LiteXCISoCCaptured
+                module.BaseSoC = capture_soc
+                try:
+                    self.run_target_main(module, target, gateware_args)
+                except LiteXCISoCCaptured:
+                    pass
+                finally:
+                    module.BaseSoC = soc_cls
+            self.socs[key] = (module, socs[0] if socs else None)
+            # Release least recently used elaborations (ex: configs whose build failed, never loaded).
+            while len(self.socs) > self.max_elaborations:
+                self.socs.popitem(last=False)
+        return self.socs[key]
+
+    def execute(self, conn, request):
+        action        = request["action"]
+        target        = request["target"]
+        gateware_args = request["gateware_args"]
+
+        # Release SoC elaboration.
+        if action == "release":
+            self.socs.pop((target, tuple(gateware_args)), None)
+            conn.sendall(f"{status_marker}0\n".encode())
+            return
+
+        # Cancel request: Terminate forked child of the request and its processes.
+        if action == "cancel":
+            if request["pid"] in self.children:
+                try:
+                    os.killpg(request["pid"], signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            conn.sendall(f"{status_marker}0\n".encode())
+            return
+
+        # Elaborate SoC (once) in worker with output redirected to client.
+        stdout, stderr = os.dup(1), os.dup(2)
+        os.dup2(conn.fileno(), 1)
+        os.dup2(conn.fileno(), 2)
+        try:
+            module, soc = self.elaborate(target, gateware_args)
+        except Exception as e:
+            module, soc = None, None
+            print(f"Elaboration error: {e}")
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(stdout, 1)
+            os.dup2(stderr, 2)
+            os.close(stdout)
+            os.close(stderr)
+        if module is None:
+            conn.sendall(f"{status_marker}1\n".encode())
+            return
+
+        # Execute request in a forked child, streaming its output to client.
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                # Own process group (cancellable with its processes), reported to client.
+                os.setsid()
+                conn.sendall(f"{pid_marker}{os.getpid()}\n".encode())
+                os.dup2(conn.fileno(), 1)
+                os.dup2(conn.fileno(), 2)
+                # Request's environment (ex: Compiler Cache stats log of the step).
+                os.environ.update(request.get("env", {}))
+                if soc is not None:
+                    module.BaseSoC = lambda *args, **kwargs: soc
+                # Request's extra arguments (not part of the elaboration, ex: toolchain threads).
+                args = gateware_args + get_action_args(action, request["output_dir"]) + request.get("build_args", [])
+                code = self.run_target_main(module, target, args)
+            except BaseException as e:
+                print(f"Error: {e}")
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                conn.sendall(f"{status_marker}{code}\n".encode())
+                os._exit(0)
+        self.children.add(pid)
+
+    def serve(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen()
+        server.settimeout(1.0)
+        print(f"LiteX HW CI worker listening on {self.socket_path}.", flush=True)
+        try:
+            while True:
+                # Reap finished children.
+                try:
+                    while (pid := os.waitpid(-1, os.WNOHANG)[0]) != 0:
+                        self.children.discard(pid)
+                except ChildProcessError:
+                    pass
+                # Accept and execute requests.
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    conn.settimeout(None)
+                    request = json.loads(conn.makefile("r").readline())
+                    if request["action"] == "stop":
+                        conn.sendall(f"{status_marker}0\n".encode())
+                        break
+                    self.execute(conn, request)
+        finally:
+            # Terminate requests still running.
+            for pid in self.children:
+                try:
+                    os.killpg(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            server.close()
+            os.remove(self.socket_path)
+
+# Worker Client ------------------------------------------------------------------------------------
+
+def worker_request(socket_path, action, target="", gateware_args=[], output_dir="", output=sys.stdout, build_args=[], pid=None, pid_file=None):
+    request = {
+        "action"        : action,
+        "target"        : target,
+        "gateware_args" : gateware_args,
+        "build_args"    : build_args,
+        "output_dir"    : str(output_dir),
+        "pid"           : pid,
+        "env"           : {name: value for name, value in os.environ.items() if name.startswith("CCACHE_")},
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        conn.sendall((json.dumps(request) + "\n").encode())
+        # Stream output until status marker (child's pid marker recorded).
+        prefix  = marker.encode()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        data    = b""
+        child   = None
+        try:
+            while True:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    output.write(decoder.decode(data, final=True))
+                    return 1
+                data += chunk
+                while (m := marker_regex.search(data)) is not None:
+                    output.write(decoder.decode(data[:m.start()]))
+                    data = data[m.end():]
+                    if m.group(1) == b"status":
+                        output.flush()
+                        return int(m.group(2))
+                    child = int(m.group(2))
+                    # Child's pid (also its process group) for memory sampling.
+                    if pid_file is not None:
+                        with open(pid_file, "w") as f:
+                            f.write(str(child))
+                # Keep a potential partial marker line (only) for next chunk.
+                start = data.rfind(b"\n") + 1
+                end   = start if (prefix.startswith(data[start:]) or data[start:].startswith(prefix)) else len(data)
+                output.write(decoder.decode(data[:end]))
+                output.flush()
+                data = data[end:]
+        except BaseException:
+            # Client interrupted (ex: fail-fast): Cancel request's child in worker.
+            if child is not None:
+                with open(os.devnull, "w") as devnull:
+                    worker_request(socket_path, "cancel", pid=child, output=devnull)
+            raise
+
+def wait_worker(socket_path, timeout=30.0):
+    start_time = time.time()
+    while time.time() - start_time < timeout:
+        if os.path.exists(socket_path):
+            return True
+        time.sleep(0.1)
+    return False
+
+# Main ---------------------------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="LiteX HW CI Warm Elaboration Worker.")
+    parser.add_argument("command",            choices=["serve", "request", "stop"], help="Start worker, send a request to it or stop it.")
+    parser.add_argument("--socket",           required=True,                        help="Worker Unix socket path.")
+    parser.add_argument("--action",           default="gateware_build",             help="Request action: firmware_build, gateware_build, load, release or cancel.")
+    parser.add_argument("--target",           default="",                           help="LiteX-Boards target.")
+    parser.add_argument("--output-dir",       default="",                           help="Build output directory.")
+    parser.add_argument("--pid-file",         default=None,                         help="File receiving the pid of the forked child running the request.")
+    parser.add_argument("--build-args",       default="",                           help="Extra target arguments of the request, not part of the elaboration (ex: toolchain threads).")
+    parser.add_argument("--max-elaborations", default=4, type=int,                  help="Serve: Maximum number of SoC elaborations retained (least recently used released).")
+    # Target gateware arguments are passed after --.
+    argv, gateware_args = sys.argv[1:], []
+    if "--" in argv:
+        argv, gateware_args = argv[:argv.index("--")], argv[argv.index("--") + 1:]
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        LiteXCIWorker(args.socket, max_elaborations=args.max_elaborations).serve()
+        return 0
+    if args.command == "stop":
+        return worker_request(args.socket, "stop")
+    # Terminated client (ex: fail-fast): Raise SystemExit to cancel the request.
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(1))
+    return worker_request(args.socket, args.action, args.target, gateware_args, args.output_dir, build_args=shlex.split(args.build_args), pid_file=args.pid_file)
+
+if __name__ == "__main__":
+    sys.exit(main())
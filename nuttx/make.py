@@ -33,7 +33,7 @@ def switch_dir(path):
 
 toolchain_name = "xpack-riscv-none-elf-gcc-12.3.0-1"
 gcc_url        = f"https://github.com/xpack-dev-tools/riscv-none-elf-gcc-xpack/releases/download/v12.3.0-1/{toolchain_name}-linux-x64.tar.gz"
-tftp_root      = "/tftpboot"
+tftp_root      = os.environ.get("LITEX_HW_CI_TFTP_ROOT", "/tftpboot") # build_<name>/images/ with LiteX HW CI TFTP server.
 
 def nuttx_clean():
     if os.path.exists("third_party/nuttx"):
@@ -76,13 +76,16 @@ def nuttx_build():
             if ret.returncode != 0:
                 return ret
 
-            # Build Nuttx Images.
-            ret = subprocess.run("make CC=riscv-none-elf-gcc V=2 -j", shell=True, env=env)
+            # Build Nuttx Images (jobs limited to LiteX HW CI's CPU budget share when provided).
+            jobs = os.environ.get("LITEX_HW_CI_JOBS", "")
+            ret  = subprocess.run(f"make CC=riscv-none-elf-gcc V=2 -j{jobs}", shell=True, env=env)
 
             return ret.returncode
 
 # FIXME: force /tftpboot cleanup ?
 def nuttx_prepare_tftp(tftp_root=tftp_root):
+    os.makedirs(tftp_root, exist_ok=True)
+
     # Sanity check.
     for f in ["boot.json", "boot.bin"]:
         if os.path.exists(os.path.join(tftp_root, f)):